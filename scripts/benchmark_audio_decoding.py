@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the STT audio decoding paths.
+Compares the legacy temp-file round trip (the old STTService._convert_audio_to_wav
+followed by whisperx.load_audio) against the AudioDecoder backends.
+
+Usage:
+    python scripts/benchmark_audio_decoding.py recording.webm [--iterations 20] [--concurrency 4]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Callable, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.audio_decoder import AudioDecoder, WHISPER_SAMPLE_RATE, av  # noqa: E402
+
+
+def legacy_decode(audio_bytes: bytes) -> np.ndarray:
+    """Reproduce the original path: FFmpeg to a temp WAV, then FFmpeg again to read it."""
+    with NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav_file:
+        wav_filename = temp_wav_file.name
+
+    try:
+        subprocess.run(
+            ["ffmpeg", "-i", "pipe:0", "-ac", "1", "-ar", str(WHISPER_SAMPLE_RATE),
+             "-f", "wav", "-y", wav_filename],
+            input=audio_bytes, capture_output=True, check=True
+        )
+        # Equivalent of whisperx.load_audio(wav_filename)
+        output = subprocess.run(
+            ["ffmpeg", "-nostdin", "-threads", "0", "-i", wav_filename, "-f", "s16le",
+             "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(WHISPER_SAMPLE_RATE), "-"],
+            capture_output=True, check=True
+        ).stdout
+        return np.frombuffer(output, np.int16).flatten().astype(np.float32) / 32768.0
+    finally:
+        os.unlink(wav_filename)
+
+
+def to_pcm16_wav(audio_bytes: bytes) -> bytes:
+    """Convert the input to a 16 kHz PCM16 WAV to exercise the fast path."""
+    return subprocess.run(
+        ["ffmpeg", "-i", "pipe:0", "-ac", "1", "-ar", str(WHISPER_SAMPLE_RATE),
+         "-acodec", "pcm_s16le", "-f", "wav", "pipe:1"],
+        input=audio_bytes, capture_output=True, check=True
+    ).stdout
+
+
+def run_benchmark(
+    name: str,
+    decode: Callable[[bytes], np.ndarray],
+    audio_bytes: bytes,
+    iterations: int,
+    concurrency: int
+) -> Dict[str, float]:
+    """Time a decode function sequentially and under concurrent load."""
+    decode(audio_bytes)  # Warm-up
+
+    latencies: List[float] = []
+
+    def timed_call(_: int) -> None:
+        start = time.perf_counter()
+        decode(audio_bytes)
+        latencies.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed_call, range(iterations)))
+    wall_time = time.perf_counter() - wall_start
+
+    return {
+        "name": name,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))] * 1000,
+        "throughput": iterations / wall_time,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark STT audio decoding paths")
+    parser.add_argument("audio_file", type=Path, help="Audio file to decode (e.g. a WebM recording)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    audio_bytes = args.audio_file.read_bytes()
+    wav_bytes = to_pcm16_wav(audio_bytes)
+
+    benchmarks = [
+        ("legacy (temp WAV + load_audio)", legacy_decode, audio_bytes),
+        ("ffmpeg pipe", AudioDecoder("ffmpeg", args.concurrency).decode, audio_bytes),
+    ]
+    if av is not None:
+        benchmarks.append(("pyav in-process", AudioDecoder("pyav", args.concurrency).decode, audio_bytes))
+    else:
+        print("PyAV not installed, skipping in-process backend (pip install av)")
+    benchmarks.append(("PCM16 WAV fast path", AudioDecoder("ffmpeg", args.concurrency).decode, wav_bytes))
+
+    print(f"\nInput: {args.audio_file} ({len(audio_bytes)} bytes), "
+          f"{args.iterations} iterations, concurrency {args.concurrency}\n")
+    print(f"{'Path':<34}{'mean (ms)':>12}{'p95 (ms)':>12}{'req/s':>10}")
+    print("-" * 68)
+
+    for name, decode, payload in benchmarks:
+        result = run_benchmark(name, decode, payload, args.iterations, args.concurrency)
+        print(f"{result['name']:<34}{result['mean_ms']:>12.2f}"
+              f"{result['p95_ms']:>12.2f}{result['throughput']:>10.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,20 +3,33 @@ FastAPI server for Jarv1s backend.
 Handles voice interaction endpoints with robust error handling and fallback mechanisms.
 """
 
+import asyncio
 import base64
+import io
+import json
+import re
+import secrets
 import time
-from typing import Optional, Dict, Any
+import wave
+from typing import AsyncIterator, Optional, Dict, Any, Tuple, Union
+from urllib.parse import quote
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import (
+    FastAPI, File, UploadFile, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
 from ..config.settings import get_settings
 from ..utils.logger import get_api_logger
 from ..utils.exceptions import JarvisBaseException, STTException, LLMException, TTSException
+from ..utils.metrics import get_metrics
 from ..services.stt_service import get_stt_service
 from ..services.llm_service import get_llm_service
-from ..services.tts_service import get_tts_service
+from ..services.tts_service import build_wav_header, get_tts_service
+from ..services.executors import get_stage_executor, shutdown_executors
+from ..services.pipeline import AudioSegment, SentencePipeline, TextDelta
 
 
 # Response models
@@ -25,7 +38,7 @@ class InteractionResponse(BaseModel):
     transcription: str
     response: str
     audio_base64: str
-    processing_time: Dict[str, float]
+    processing_time: Dict[str, Union[float, str]]
 
 
 class HealthResponse(BaseModel):
@@ -54,6 +67,41 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Client-supplied session IDs must be short opaque tokens
+_SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{8,128}$")
+
+
+def _resolve_session_id(headers: Any, cookies: Dict[str, str], query_value: Optional[str] = None) -> Optional[str]:
+    """Pick a valid session ID from the header, query string or cookie, in that order."""
+    candidates = (
+        headers.get(settings.server.session_header),
+        query_value,
+        cookies.get(settings.server.session_cookie),
+    )
+    for candidate in candidates:
+        if candidate and _SESSION_ID_PATTERN.match(candidate):
+            return candidate
+    return None
+
+
+@app.middleware("http")
+async def session_middleware(request: Request, call_next):
+    """Attach a conversation session ID to every request, issuing a cookie for new clients."""
+    session_id = _resolve_session_id(request.headers, request.cookies)
+    issued = session_id is None
+    if issued:
+        session_id = secrets.token_urlsafe(16)
+    request.state.session_id = session_id
+    
+    response = await call_next(request)
+    response.headers[settings.server.session_header] = session_id
+    if issued:
+        response.set_cookie(
+            settings.server.session_cookie, session_id, httponly=True, samesite="lax"
+        )
+    return response
+
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -61,6 +109,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Transcription", "X-Response-Text", "X-Processing-Time", "X-Fallback",
+        settings.server.session_header
+    ],
 )
 
 # Global fallback audio storage
@@ -106,8 +158,8 @@ class FallbackManager:
                 "System will work but error responses may not have audio."
             )
     
-    def get_fallback_response(self, fallback_type: str) -> Dict[str, str]:
-        """Get a fallback response for error scenarios."""
+    def get_fallback(self, fallback_type: str) -> Tuple[str, Optional[bytes]]:
+        """Get the fallback text and its preloaded WAV audio (if any)."""
         if fallback_type == "no_transcription":
             text = self.settings.fallback_no_transcription
             audio = fallback_audio_cache.get("no_transcription")
@@ -118,6 +170,12 @@ class FallbackManager:
             text = "An unexpected error occurred."
             audio = None
         
+        return text, audio
+    
+    def get_fallback_response(self, fallback_type: str) -> Dict[str, str]:
+        """Get a fallback response for error scenarios."""
+        text, audio = self.get_fallback(fallback_type)
+        
         audio_base64 = ""
         if audio:
             audio_base64 = base64.b64encode(audio).decode('utf-8')
@@ -153,49 +211,183 @@ async def startup_event():
     logger.info("Startup completed successfully")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the inference pools, STT workers and Piper sessions; flush conversation writes."""
+    shutdown_executors()
+    get_stt_service().shutdown()
+    get_tts_service().shutdown()
+    get_llm_service().shutdown()
+
+
+# Binary response formats for /interact (besides the default base64-in-JSON)
+AUDIO_RESPONSE_FORMATS = ("wav", "pcm")
+
+
+def _audio_headers(
+    transcription: str,
+    response_text: str,
+    processing_times: Dict[str, Union[float, str]],
+    fallback_type: Optional[str] = None
+) -> Dict[str, str]:
+    """Build metadata headers for binary audio responses (percent-encoded UTF-8)."""
+    headers = {
+        "X-Transcription": quote(transcription),
+        "X-Response-Text": quote(response_text),
+        "X-Processing-Time": json.dumps(processing_times),
+    }
+    if fallback_type:
+        headers["X-Fallback"] = fallback_type
+    return headers
+
+
+def _audio_media_type(response_format: str, sample_rate: int) -> str:
+    """Get the media type for a binary audio response format."""
+    if response_format == "pcm":
+        return f"audio/L16;rate={sample_rate};channels=1;endianness=little-endian"
+    return "audio/wav"
+
+
+def _fallback_interaction_response(
+    fallback_type: str,
+    processing_times: Dict[str, Union[float, str]],
+    response_format: str
+) -> Union[Dict[str, Any], Response]:
+    """Build a fallback response in the requested response format."""
+    if response_format not in AUDIO_RESPONSE_FORMATS:
+        fallback_response = fallback_manager.get_fallback_response(fallback_type)
+        fallback_response["processing_time"] = processing_times
+        return fallback_response
+    
+    text, audio = fallback_manager.get_fallback(fallback_type)
+    headers = _audio_headers("", text, processing_times, fallback_type)
+    
+    if not audio:
+        return Response(content=b"", media_type="audio/wav", headers=headers)
+    
+    if response_format == "pcm":
+        pcm, sample_rate = _wav_to_pcm(audio)
+        return Response(
+            content=pcm,
+            media_type=_audio_media_type("pcm", sample_rate),
+            headers=headers
+        )
+    
+    return Response(content=audio, media_type="audio/wav", headers=headers)
+
+
+async def _streaming_audio_response(
+    user_text: str,
+    llm_response: str,
+    processing_times: Dict[str, Union[float, str]],
+    response_format: str,
+    voice: Optional[str] = None
+) -> StreamingResponse:
+    """Stream synthesized audio as a chunked binary body while Piper renders it."""
+    tts_service = get_tts_service()
+    # May load the voice (and its ONNX sessions), so it runs on the TTS pool
+    sample_rate = await get_stage_executor("tts").run(tts_service.get_sample_rate, voice)
+    
+    # Render the first chunk before committing to a 200: a synthesis failure
+    # here still reaches the caller's fallback path
+    audio_chunks = get_stage_executor("tts").iterate(
+        tts_service.synthesize_stream_raw(llm_response, voice)
+    )
+    first_chunk = await anext(audio_chunks, b"")
+    
+    async def audio_body() -> AsyncIterator[bytes]:
+        if response_format == "wav":
+            yield build_wav_header(sample_rate)
+        if first_chunk:
+            yield first_chunk
+        try:
+            async for chunk in audio_chunks:
+                yield chunk
+        except Exception as e:
+            # Headers are already sent: end the body cleanly, leaving a shorter reply
+            logger.error(f"Error while streaming response audio: {e}")
+            get_metrics().increment("tts.stream.errors")
+    
+    return StreamingResponse(
+        audio_body(),
+        media_type=_audio_media_type(response_format, sample_rate),
+        headers=_audio_headers(user_text, llm_response, processing_times)
+    )
+
+
 @app.post("/interact", response_model=InteractionResponse)
-async def interact(audio_file: UploadFile = File(...)):
+async def interact(
+    request: Request,
+    audio_file: UploadFile = File(...),
+    response_format: str = Query("json", pattern="^(json|wav|pcm)$"),
+    voice: Optional[str] = Query(None, description="Piper voice for the reply audio")
+):
     """
     Complete voice interaction cycle: STT -> LLM -> TTS.
     
     Handles the full conversation pipeline with robust error handling
     and fallback mechanisms to ensure the API never returns errors.
+    
+    With response_format=wav (or pcm) the reply audio is streamed as a raw
+    chunked body instead of base64-in-JSON; transcription, reply text and
+    timings are returned in X-Transcription, X-Response-Text (percent-encoded)
+    and X-Processing-Time headers.
+    
+    The optional voice parameter selects the reply voice (e.g.
+    en_US-lessac-medium); voices are loaded on first use. The conversation
+    is scoped to the client's session (X-Session-ID header or session cookie).
     """
     start_time = time.time()
     processing_times = {}
     
     logger.info("Processing voice interaction request")
     
+    if voice and not get_tts_service().has_voice(voice):
+        raise HTTPException(status_code=400, detail=f"Unknown voice '{voice}'")
+    
     try:
         # Step 1: Speech-to-Text
         stt_start = time.time()
         audio_bytes = await audio_file.read()
         
         stt_service = get_stt_service()
-        user_text = stt_service.transcribe_audio(audio_bytes)
+        transcription = await get_stage_executor("stt").run(
+            stt_service.transcribe, audio_bytes, audio_file.content_type
+        )
+        user_text = transcription.text
         processing_times["stt"] = round(time.time() - stt_start, 3)
+        processing_times.update(transcription.stats)
         
         logger.info(f"Transcription completed: '{user_text}'")
         
         # Handle empty transcription
         if not user_text.strip():
             logger.info("Empty transcription, returning fallback response")
-            fallback_response = fallback_manager.get_fallback_response("no_transcription")
-            fallback_response["processing_time"] = processing_times
-            return fallback_response
+            return _fallback_interaction_response(
+                "no_transcription", processing_times, response_format
+            )
         
         # Step 2: LLM Processing
         llm_start = time.time()
         llm_service = get_llm_service()
-        llm_response = llm_service.get_response(user_text)
+        llm_response = await llm_service.get_response_async(
+            user_text, request.state.session_id
+        )
         processing_times["llm"] = round(time.time() - llm_start, 3)
         
         logger.info(f"LLM response generated: '{llm_response}'")
         
         # Step 3: Text-to-Speech
+        if response_format in AUDIO_RESPONSE_FORMATS:
+            return await _streaming_audio_response(
+                user_text, llm_response, processing_times, response_format, voice
+            )
+        
         tts_start = time.time()
         tts_service = get_tts_service()
-        response_audio_bytes, _ = tts_service.synthesize_audio(llm_response)
+        response_audio_bytes, _ = await get_stage_executor("tts").run(
+            tts_service.synthesize_audio, llm_response, voice
+        )
         processing_times["tts"] = round(time.time() - tts_start, 3)
         
         # Encode audio to base64
@@ -216,16 +408,260 @@ async def interact(audio_file: UploadFile = File(...)):
     except JarvisBaseException as e:
         # Handle known service exceptions
         logger.error(f"Service error during interaction: {e}")
-        fallback_response = fallback_manager.get_fallback_response("internal_error")
-        fallback_response["processing_time"] = processing_times
-        return fallback_response
+        return _fallback_interaction_response(
+            "internal_error", processing_times, response_format
+        )
         
     except Exception as e:
         # Handle unexpected errors
         logger.error(f"Unexpected error during interaction: {e}")
-        fallback_response = fallback_manager.get_fallback_response("internal_error")
-        fallback_response["processing_time"] = processing_times
-        return fallback_response
+        return _fallback_interaction_response(
+            "internal_error", processing_times, response_format
+        )
+
+
+def _wav_to_pcm(wav_bytes: bytes) -> Tuple[bytes, int]:
+    """Extract raw PCM frames and sample rate from in-memory WAV bytes."""
+    with wave.open(io.BytesIO(wav_bytes), 'rb') as wav_file:
+        return wav_file.readframes(wav_file.getnframes()), wav_file.getframerate()
+
+
+async def _send_fallback_stream(
+    websocket: WebSocket,
+    fallback_type: str,
+    processing_times: Dict[str, Union[float, str]]
+) -> None:
+    """Send a fallback reply (text plus preloaded audio) over the WebSocket."""
+    text, audio = fallback_manager.get_fallback(fallback_type)
+    
+    await websocket.send_json({"type": "response", "text": text, "fallback": fallback_type})
+    
+    if audio:
+        pcm, sample_rate = _wav_to_pcm(audio)
+        await websocket.send_json({
+            "type": "audio_start",
+            "format": "pcm_s16le",
+            "sample_rate": sample_rate,
+            "channels": 1
+        })
+        await websocket.send_bytes(pcm)
+        await websocket.send_json({"type": "audio_end"})
+    
+    await websocket.send_json({"type": "done", "processing_time": processing_times})
+
+
+async def _receive_utterance(websocket: WebSocket, session: Dict[str, Any]) -> bytes:
+    """
+    Collect streamed audio chunks until the client sends {"type": "end"}.
+    
+    A {"type": "start", "content_type": ..., "voice": ...} message declares the
+    audio format (e.g. audio/L16;rate=16000;endianness=little-endian) and
+    reply voice for this and following utterances. Optionally emits partial
+    transcripts of the audio received so far while the client is still
+    talking. An utterance that outgrows ws_max_audio_bytes is
+    reported once and discarded up to its "end" frame.
+    """
+    buffer = bytearray()
+    interval = settings.server.ws_partial_transcript_interval
+    last_partial = time.time()
+    partial_task: Optional[asyncio.Task] = None
+    # Set once the utterance outgrows ws_max_audio_bytes
+    overflowed = False
+    
+    async def send_partial(snapshot: bytes) -> None:
+        try:
+            # Growing snapshots never repeat: keep them out of the transcript cache
+            text = await get_stage_executor("stt").run(
+                get_stt_service().transcribe_audio, snapshot, session.get("content_type"),
+                use_cache=False
+            )
+            if text.strip():
+                await websocket.send_json({"type": "transcript_partial", "text": text})
+        except Exception as e:
+            # Partial transcripts are best effort; incomplete containers may not decode
+            logger.debug(f"Partial transcription skipped: {e}")
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            
+            if message.get("bytes"):
+                if overflowed:
+                    continue
+                buffer.extend(message["bytes"])
+                if len(buffer) > settings.server.ws_max_audio_bytes:
+                    # Drop the rest of this utterance up to its "end" frame
+                    overflowed = True
+                    buffer.clear()
+                    if partial_task is not None and not partial_task.done():
+                        partial_task.cancel()
+                    await websocket.send_json({
+                        "type": "error",
+                        "message": "Streamed audio exceeds the maximum allowed size"
+                    })
+                    continue
+                
+                if (
+                    interval > 0
+                    and time.time() - last_partial >= interval
+                    and (partial_task is None or partial_task.done())
+                ):
+                    last_partial = time.time()
+                    partial_task = asyncio.create_task(send_partial(bytes(buffer)))
+                continue
+            
+            if message.get("text"):
+                control = json.loads(message["text"])
+                if not isinstance(control, dict):
+                    raise ValueError("Control messages must be JSON objects")
+                if control.get("type") == "start":
+                    voice = control.get("voice")
+                    if voice and not get_tts_service().has_voice(voice):
+                        raise ValueError(f"Unknown voice '{voice}'")
+                    session["content_type"] = control.get("content_type")
+                    session["voice"] = voice
+                elif control.get("type") == "end":
+                    if overflowed:
+                        overflowed = False
+                        last_partial = time.time()
+                        continue
+                    return bytes(buffer)
+    finally:
+        if partial_task is not None and not partial_task.done():
+            partial_task.cancel()
+
+
+async def _stream_interaction(
+    websocket: WebSocket,
+    audio_bytes: bytes,
+    content_type: Optional[str] = None,
+    voice: Optional[str] = None,
+    session_id: Optional[str] = None
+) -> None:
+    """Run STT -> LLM -> TTS for one utterance, streaming results as they are ready."""
+    start_time = time.time()
+    processing_times: Dict[str, Union[float, str]] = {}
+    audio_open = False
+    
+    try:
+        # Step 1: Speech-to-Text
+        stt_start = time.time()
+        stt_service = get_stt_service()
+        transcription = await get_stage_executor("stt").run(
+            stt_service.transcribe, audio_bytes, content_type
+        )
+        user_text = transcription.text
+        processing_times["stt"] = round(time.time() - stt_start, 3)
+        processing_times.update(transcription.stats)
+        
+        await websocket.send_json({"type": "transcript", "text": user_text})
+        
+        if not user_text.strip():
+            logger.info("Empty transcription, streaming fallback response")
+            await _send_fallback_stream(websocket, "no_transcription", processing_times)
+            return
+        
+        # Step 2+3: LLM streaming with sentence-pipelined TTS
+        llm_start = time.time()
+        llm_service = get_llm_service()
+        tts_service = get_tts_service()
+        # Loading a voice on first use must not stall the event loop
+        sample_rate = await get_stage_executor("tts").run(tts_service.get_sample_rate, voice)
+        await websocket.send_json({
+            "type": "audio_start",
+            "format": "pcm_s16le",
+            "sample_rate": sample_rate,
+            "channels": 1
+        })
+        audio_open = True
+        
+        response_parts = []
+        pipeline = SentencePipeline(tts_service, voice=voice)
+        deltas = llm_service.stream_response_async(user_text, session_id)
+        async for event in pipeline.run(deltas):
+            if isinstance(event, TextDelta):
+                if not response_parts:
+                    processing_times["llm_first_token"] = round(time.time() - llm_start, 3)
+                response_parts.append(event.text)
+                await websocket.send_json({"type": "llm_delta", "text": event.text})
+            elif isinstance(event, AudioSegment):
+                if "first_audio" not in processing_times:
+                    processing_times["first_audio"] = round(time.time() - start_time, 3)
+                await websocket.send_json({
+                    "type": "audio_segment",
+                    "index": event.index,
+                    "text": event.text
+                })
+                await websocket.send_bytes(event.pcm)
+        
+        llm_response = "".join(response_parts).strip()
+        await websocket.send_json({"type": "response", "text": llm_response})
+        
+        await websocket.send_json({"type": "audio_end"})
+        audio_open = False
+        processing_times["llm_tts"] = round(time.time() - llm_start, 3)
+        processing_times["total"] = round(time.time() - start_time, 3)
+        
+        logger.info(f"Streaming interaction completed in {processing_times['total']}s")
+        await websocket.send_json({"type": "done", "processing_time": processing_times})
+        
+    except WebSocketDisconnect:
+        raise
+    except Exception as e:
+        logger.error(f"Error during streaming interaction: {e}")
+        await websocket.send_json({"type": "error", "message": str(e)})
+        if audio_open:
+            # Close the reply's audio stream before the fallback opens its own
+            await websocket.send_json({"type": "audio_end"})
+        await _send_fallback_stream(websocket, "internal_error", processing_times)
+
+
+@app.websocket("/ws/interact")
+async def interact_stream(websocket: WebSocket):
+    """
+    Streaming voice interaction over WebSocket.
+    
+    The client may declare its audio format and reply voice with {"type": "start",
+    "content_type": "audio/L16;rate=16000;endianness=little-endian",
+    "voice": "en_US-lessac-medium"}, streams microphone chunks as binary frames
+    and closes each utterance with a {"type": "end"} text frame. The server answers with JSON
+    events (transcript_partial, transcript, llm_delta, response, audio_start,
+    audio_segment, audio_end, done, error) and binary PCM16 mono audio frames as soon as each
+    stage produces them. Several utterances can be sent over one connection.
+    
+    The conversation session comes from the X-Session-ID header, a
+    session_id query parameter or the session cookie; otherwise the
+    connection gets its own session.
+    """
+    await websocket.accept()
+    logger.info("WebSocket interaction session opened")
+    session_id = _resolve_session_id(
+        websocket.headers, websocket.cookies, websocket.query_params.get("session_id")
+    )
+    session: Dict[str, Any] = {
+        "content_type": None,
+        "voice": None,
+        "session_id": session_id or secrets.token_urlsafe(16)
+    }
+    
+    try:
+        while True:
+            try:
+                audio_bytes = await _receive_utterance(websocket, session)
+            except (ValueError, json.JSONDecodeError) as e:
+                await websocket.send_json({"type": "error", "message": str(e)})
+                continue
+            
+            await _stream_interaction(
+                websocket, audio_bytes, session["content_type"], session["voice"],
+                session["session_id"]
+            )
+            
+    except WebSocketDisconnect:
+        logger.info("WebSocket interaction session closed")
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -239,12 +675,13 @@ async def health_check():
     
     services_status = {
         "stt": "operational" if stt_service.is_available() else "unavailable",
-        "llm": "operational" if llm_service.is_available() else "unavailable",
+        "llm": "operational" if await llm_service.is_available_async() else "unavailable",
         "tts": "operational" if tts_service.is_available() else "unavailable"
     }
     
     models_info = {
         "whisper": settings.stt.model_size,
+        "stt_engine": settings.stt.engine,
         "tts_voice": settings.tts.model_path.split('/')[-1].replace('.onnx', '')
     }
     
@@ -261,13 +698,13 @@ async def health_check():
 
 
 @app.post("/reset", response_model=ResetResponse)
-async def reset_conversation():
-    """Reset the conversation history."""
+async def reset_conversation(request: Request):
+    """Reset the conversation history of the caller's session."""
     logger.info("Resetting conversation history")
     
     try:
         llm_service = get_llm_service()
-        result = llm_service.reset_conversation()
+        result = await llm_service.reset_conversation_async(request.state.session_id)
         logger.info("Conversation history reset successfully")
         return result
         
@@ -288,12 +725,18 @@ async def root():
     }
 
 
+@app.get("/metrics")
+async def get_metrics_snapshot():
+    """Get in-process performance counters and timings."""
+    return get_metrics().snapshot()
+
+
 @app.get("/conversation/info")
-async def get_conversation_info():
-    """Get information about the current conversation."""
+async def get_conversation_info(request: Request):
+    """Get information about the caller's conversation."""
     try:
         llm_service = get_llm_service()
-        return llm_service.get_conversation_info()
+        return await llm_service.get_conversation_info_async(request.state.session_id)
     except Exception as e:
         logger.error(f"Failed to get conversation info: {e}")
         raise HTTPException(status_code=500, detail="Failed to get conversation info")
\ No newline at end of file
@@ -17,7 +17,29 @@ class LLMSettings(BaseSettings):
     api_key: str = Field(default="not-required", env="LLM_API_KEY")
     model_name: str = Field(default="openai/lmstudio-local-model", env="LLM_MODEL_NAME")
     temperature: float = Field(default=0.7, env="LLM_TEMPERATURE")
-    max_history_pairs: int = Field(default=5, env="LLM_MAX_HISTORY_PAIRS")
+    # History is trimmed to a token budget; the pair cap is optional (0 = none)
+    history_token_budget: int = Field(default=3000, env="LLM_HISTORY_TOKEN_BUDGET")
+    max_history_pairs: int = Field(default=0, env="LLM_MAX_HISTORY_PAIRS")
+    # "sliding" or "stable_prefix" (block trims that keep the KV-cached prefix intact)
+    history_mode: str = Field(default="sliding", env="LLM_HISTORY_MODE")
+    trim_target_ratio: float = Field(default=0.5, env="LLM_TRIM_TARGET_RATIO")
+    prompt_cache_hints: bool = Field(default=True, env="LLM_PROMPT_CACHE_HINTS")
+    # "auto" (model tokenizer via litellm, else heuristic), "litellm" or "heuristic"
+    tokenizer: str = Field(default="auto", env="LLM_TOKENIZER")
+    # Background compaction: past the threshold, older turns are summarized by the LLM
+    compaction_enabled: bool = Field(default=False, env="LLM_COMPACTION_ENABLED")
+    compaction_threshold_tokens: int = Field(default=2000, env="LLM_COMPACTION_THRESHOLD_TOKENS")
+    compaction_keep_recent_pairs: int = Field(default=2, env="LLM_COMPACTION_KEEP_RECENT_PAIRS")
+    compaction_summary_max_tokens: int = Field(default=256, env="LLM_COMPACTION_SUMMARY_MAX_TOKENS")
+    # Per-session conversation store: LRU/TTL eviction under count and memory bounds
+    session_max_count: int = Field(default=1000, env="LLM_SESSION_MAX_COUNT")
+    session_ttl_seconds: float = Field(default=3600.0, env="LLM_SESSION_TTL_SECONDS")
+    session_memory_max_mb: int = Field(default=64, env="LLM_SESSION_MEMORY_MAX_MB")
+    # Conversation persistence: "sqlite" (append-only log in WAL mode) or "memory"
+    persistence_backend: str = Field(default="sqlite", env="LLM_PERSISTENCE_BACKEND")
+    persistence_path: str = Field(default="data/conversations.db", env="LLM_PERSISTENCE_PATH")
+    persistence_batch_size: int = Field(default=64, env="LLM_PERSISTENCE_BATCH_SIZE")
+    persistence_flush_ms: float = Field(default=50.0, env="LLM_PERSISTENCE_FLUSH_MS")
     
     class Config:
         env_prefix = "LLM_"
@@ -32,6 +54,36 @@ class STTSettings(BaseSettings):
     compute_type: str = Field(default="int8", env="STT_COMPUTE_TYPE")
     language: str = Field(default="es", env="STT_LANGUAGE")
     batch_size: int = Field(default=4, env="STT_BATCH_SIZE")
+    # Inference engine: "whisperx" (full pipeline) or "faster-whisper" (CTranslate2 only)
+    engine: str = Field(default="whisperx", env="STT_ENGINE")
+    beam_size: int = Field(default=5, env="STT_BEAM_SIZE")
+    # faster-whisper's Silero VAD; off by default since clips are already VAD-trimmed
+    vad_filter: bool = Field(default=False, env="STT_VAD_FILTER")
+    cpu_threads: int = Field(default=0, env="STT_CPU_THREADS")  # 0 = engine default
+    num_workers: int = Field(default=1, env="STT_NUM_WORKERS")
+    # Duration routing: "max_seconds:model_size" tiers; longer clips use model_size
+    # (in-process single-request mode only; rejected with batching or the worker pool)
+    routing_enabled: bool = Field(default=False, env="STT_ROUTING_ENABLED")
+    routing_tiers: list[str] = Field(default=["1.5:tiny", "3:base"], env="STT_ROUTING_TIERS")
+    # Escalate to model_size when a smaller model's confidence is below this (0 = never)
+    routing_min_confidence: float = Field(default=0.5, env="STT_ROUTING_MIN_CONFIDENCE")
+    # Cross-request micro-batching: segments arriving within the window share a model pass
+    batching_enabled: bool = Field(default=False, env="STT_BATCHING_ENABLED")
+    batch_window_ms: float = Field(default=5.0, env="STT_BATCH_WINDOW_MS")
+    batch_max_segments: int = Field(default=16, env="STT_BATCH_MAX_SEGMENTS")
+    # Worker-pool mode: N processes with their own model (0 = in-process model)
+    worker_pool_size: int = Field(default=0, env="STT_WORKER_POOL_SIZE")
+    worker_intra_threads: int = Field(default=2, env="STT_WORKER_INTRA_THREADS")
+    worker_timeout_seconds: float = Field(default=60.0, env="STT_WORKER_TIMEOUT_SECONDS")
+    # Crashed workers restart after a doubling backoff; a slot crashing this many
+    # times in a row before becoming ready is abandoned
+    worker_max_restarts: int = Field(default=5, env="STT_WORKER_MAX_RESTARTS")
+    worker_restart_backoff_seconds: float = Field(default=1.0, env="STT_WORKER_RESTART_BACKOFF_SECONDS")
+    # Result cache keyed by a hash of the upload (and optionally of the decoded PCM)
+    cache_enabled: bool = Field(default=True, env="STT_CACHE_ENABLED")
+    cache_max_entries: int = Field(default=512, env="STT_CACHE_MAX_ENTRIES")
+    cache_max_bytes: int = Field(default=1024 * 1024, env="STT_CACHE_MAX_BYTES")
+    cache_hash_pcm: bool = Field(default=False, env="STT_CACHE_HASH_PCM")
     
     class Config:
         env_prefix = "STT_"
@@ -50,6 +102,22 @@ class TTSSettings(BaseSettings):
         env="TTS_CONFIG_PATH"
     )
     sample_rate: int = Field(default=22050, env="TTS_SAMPLE_RATE")
+    # Extra voices are loaded on demand from <voices_dir>/<voice>.onnx (+ .onnx.json)
+    voices_dir: str = Field(default="models/tts", env="TTS_VOICES_DIR")
+    voice_memory_budget_mb: int = Field(default=1024, env="TTS_VOICE_MEMORY_BUDGET_MB")
+    # Sentence pipelining: split at clauses (,;:) once a segment reaches this length
+    segment_min_clause_chars: int = Field(default=40, env="TTS_SEGMENT_MIN_CLAUSE_CHARS")
+    segment_max_chars: int = Field(default=200, env="TTS_SEGMENT_MAX_CHARS")
+    # Session-pool mode: N ONNX sessions synthesize sentences in parallel (0 = one shared voice)
+    session_pool_size: int = Field(default=0, env="TTS_SESSION_POOL_SIZE")
+    intra_op_threads: int = Field(default=1, env="TTS_INTRA_OP_THREADS")
+    inter_op_threads: int = Field(default=1, env="TTS_INTER_OP_THREADS")
+    # Synthesized audio cache: in-memory LRU in front of a persistent disk tier
+    cache_enabled: bool = Field(default=True, env="TTS_CACHE_ENABLED")
+    cache_dir: str = Field(default="cache/tts", env="TTS_CACHE_DIR")
+    cache_memory_max_entries: int = Field(default=256, env="TTS_CACHE_MEMORY_MAX_ENTRIES")
+    cache_memory_max_bytes: int = Field(default=32 * 1024 * 1024, env="TTS_CACHE_MEMORY_MAX_BYTES")
+    cache_disk_max_bytes: int = Field(default=256 * 1024 * 1024, env="TTS_CACHE_DISK_MAX_BYTES")  # 0 = memory only
     
     class Config:
         env_prefix = "TTS_"
@@ -67,6 +135,16 @@ class ServerSettings(BaseSettings):
         default=["http://localhost:5173", "http://127.0.0.1:5173"],
         env="CORS_ORIGINS"
     )
+    # Seconds between partial transcripts on /ws/interact (0 disables them).
+    # Each partial is a full Whisper pass over the audio received so far.
+    ws_partial_transcript_interval: float = Field(
+        default=0.0,
+        env="WS_PARTIAL_TRANSCRIPT_INTERVAL"
+    )
+    ws_max_audio_bytes: int = Field(default=10 * 1024 * 1024, env="WS_MAX_AUDIO_BYTES")
+    # Conversation session ID: request header, falling back to this cookie
+    session_header: str = Field(default="X-Session-ID", env="SESSION_HEADER")
+    session_cookie: str = Field(default="jarv1s_session", env="SESSION_COOKIE")
     
     class Config:
         env_prefix = "SERVER_"
@@ -79,12 +157,38 @@ class AudioSettings(BaseSettings):
     sample_rate: int = Field(default=16000, env="AUDIO_SAMPLE_RATE")
     channels: int = Field(default=1, env="AUDIO_CHANNELS")
     chunk_size: int = Field(default=1024, env="AUDIO_CHUNK_SIZE")
+    # Upload decoding: "auto" uses in-process PyAV when installed, else FFmpeg
+    decoder_backend: str = Field(default="auto", env="AUDIO_DECODER_BACKEND")
+    decoder_max_concurrency: int = Field(default=4, env="AUDIO_DECODER_MAX_CONCURRENCY")
+    # Silence fast path: clips that are too short or too quiet skip Whisper entirely
+    silence_detection_enabled: bool = Field(default=True, env="AUDIO_SILENCE_DETECTION_ENABLED")
+    silence_rms_threshold: float = Field(default=0.01, env="AUDIO_SILENCE_RMS_THRESHOLD")
+    silence_frame_ms: int = Field(default=30, env="AUDIO_SILENCE_FRAME_MS")
+    min_duration_seconds: float = Field(default=0.3, env="AUDIO_MIN_DURATION_SECONDS")
+    min_speech_seconds: float = Field(default=0.15, env="AUDIO_MIN_SPEECH_SECONDS")
+    # VAD trimming: drop edge silence and cap internal pauses before transcription
+    vad_trim_enabled: bool = Field(default=True, env="AUDIO_VAD_TRIM_ENABLED")
+    vad_padding_ms: int = Field(default=200, env="AUDIO_VAD_PADDING_MS")
+    vad_max_pause_ms: int = Field(default=500, env="AUDIO_VAD_MAX_PAUSE_MS")
     
     class Config:
         env_prefix = "AUDIO_"
         extra = "ignore"
 
 
+class ExecutorSettings(BaseSettings):
+    """Thread pool sizes for blocking model inference stages."""
+    
+    stt_pool_size: int = Field(default=2, env="EXECUTOR_STT_POOL_SIZE")
+    tts_pool_size: int = Field(default=2, env="EXECUTOR_TTS_POOL_SIZE")
+    default_pool_size: int = Field(default=2, env="EXECUTOR_DEFAULT_POOL_SIZE")
+    llm_max_concurrency: int = Field(default=8, env="EXECUTOR_LLM_MAX_CONCURRENCY")
+    
+    class Config:
+        env_prefix = "EXECUTOR_"
+        extra = "ignore"
+
+
 class LoggingSettings(BaseSettings):
     """Logging configuration."""
     
@@ -113,6 +217,7 @@ class Settings(BaseSettings):
     tts: TTSSettings = TTSSettings()
     server: ServerSettings = ServerSettings()
     audio: AudioSettings = AudioSettings()
+    executor: ExecutorSettings = ExecutorSettings()
     logging: LoggingSettings = LoggingSettings()
     
     # Fallback messages
@@ -0,0 +1,244 @@
+"""
+Audio decoding subsystem for the STT pipeline.
+Turns uploaded audio into 16 kHz mono float32 samples with bounded concurrency,
+zero-subprocess fast paths for PCM16 WAV and raw audio/L16, and an in-process
+PyAV decoder when available.
+"""
+
+import io
+import struct
+import subprocess
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from ..config.settings import get_settings
+from ..utils.logger import get_stt_logger
+from ..utils.exceptions import AudioProcessingException
+
+try:
+    import av
+except ImportError:  # PyAV missing: fall back to the FFmpeg subprocess
+    av = None
+
+
+# Whisper models expect 16 kHz mono float32 audio
+WHISPER_SAMPLE_RATE = 16000
+
+DECODER_BACKENDS = ("auto", "pyav", "ffmpeg")
+
+# Content types parsed directly with NumPy instead of a decoder
+WAV_CONTENT_TYPES = ("audio/wav", "audio/x-wav", "audio/wave", "audio/vnd.wave")
+L16_CONTENT_TYPE = "audio/l16"
+
+
+def parse_content_type(content_type: Optional[str]) -> Tuple[str, Dict[str, str]]:
+    """Split a content type into its lowercase media type and parameters."""
+    if not content_type:
+        return "", {}
+    media_type, *raw_params = content_type.split(";")
+    params = {}
+    for raw_param in raw_params:
+        key, _, value = raw_param.partition("=")
+        params[key.strip().lower()] = value.strip().strip('"').lower()
+    return media_type.strip().lower(), params
+
+
+def parse_l16(audio_bytes: bytes, params: Dict[str, str]) -> np.ndarray:
+    """
+    Parse raw audio/L16 samples (RFC 2586) zero-copy with np.frombuffer.
+
+    L16 is big-endian by definition; clients sending native little-endian
+    PCM declare it with an "endianness=little-endian" parameter.
+    """
+    try:
+        sample_rate = int(params.get("rate", WHISPER_SAMPLE_RATE))
+        channels = int(params.get("channels", 1))
+    except ValueError as e:
+        raise AudioProcessingException("Invalid audio/L16 parameters", str(e))
+    if sample_rate <= 0 or channels <= 0:
+        raise AudioProcessingException("Invalid audio/L16 parameters", f"{params}")
+
+    dtype = "<i2" if params.get("endianness") == "little-endian" else ">i2"
+    usable = len(audio_bytes) - len(audio_bytes) % (2 * channels)
+    pcm = np.frombuffer(audio_bytes, dtype=dtype, count=usable // 2)
+    return pcm16_to_float32(pcm, channels, sample_rate)
+
+
+def resample_linear(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """Resample mono float32 audio with vectorized linear interpolation."""
+    if source_rate == target_rate or samples.size == 0:
+        return samples
+    target_length = int(round(samples.size * target_rate / source_rate))
+    positions = np.arange(target_length, dtype=np.float64) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(samples.size), samples).astype(np.float32)
+
+
+def parse_pcm16_wav(audio_bytes: bytes) -> Optional[np.ndarray]:
+    """
+    Parse a PCM16 WAV container without any subprocess.
+
+    Returns 16 kHz mono float32 samples, or None when the data is not a plain
+    16-bit PCM WAV (the caller then falls back to a full decoder).
+    """
+    if len(audio_bytes) < 44 or audio_bytes[:4] != b"RIFF" or audio_bytes[8:12] != b"WAVE":
+        return None
+
+    offset = 12
+    channels = sample_rate = bits_per_sample = None
+    view = memoryview(audio_bytes)
+
+    while offset + 8 <= len(audio_bytes):
+        chunk_id = audio_bytes[offset:offset + 4]
+        chunk_size = struct.unpack_from("<I", audio_bytes, offset + 4)[0]
+        body = offset + 8
+
+        if chunk_id == b"fmt ":
+            format_tag, channels, sample_rate = struct.unpack_from("<HHI", audio_bytes, body)
+            bits_per_sample = struct.unpack_from("<H", audio_bytes, body + 14)[0]
+            if format_tag != 1 or bits_per_sample != 16:
+                return None
+        elif chunk_id == b"data":
+            if channels is None:
+                return None
+            # Streamed WAVs may declare an open-ended data size
+            end = min(body + chunk_size, len(audio_bytes))
+            end -= (end - body) % (2 * channels)
+            pcm = np.frombuffer(view[body:end], dtype="<i2")
+            return pcm16_to_float32(pcm, channels, sample_rate)
+
+        offset = body + chunk_size + (chunk_size & 1)
+
+    return None
+
+
+def pcm16_to_float32(pcm: np.ndarray, channels: int, sample_rate: int) -> np.ndarray:
+    """Normalize interleaved PCM16 samples to 16 kHz mono float32 in [-1, 1)."""
+    samples = pcm.astype(np.float32) * (1.0 / 32768.0)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return resample_linear(samples, sample_rate, WHISPER_SAMPLE_RATE)
+
+
+class AudioDecoder:
+    """Decodes uploaded audio to Whisper-ready samples with bounded concurrency."""
+
+    def __init__(self, backend: Optional[str] = None, max_concurrency: Optional[int] = None):
+        audio_settings = get_settings().audio
+        self.logger = get_stt_logger()
+        self.backend = self._resolve_backend(backend or audio_settings.decoder_backend)
+        self._slots = threading.BoundedSemaphore(
+            max_concurrency or audio_settings.decoder_max_concurrency
+        )
+        self.logger.info(f"Audio decoder initialized with '{self.backend}' backend")
+
+    def _resolve_backend(self, backend: str) -> str:
+        """Resolve 'auto' and validate the configured backend."""
+        if backend not in DECODER_BACKENDS:
+            raise AudioProcessingException(
+                f"Unknown audio decoder backend '{backend}'",
+                f"Expected one of: {', '.join(DECODER_BACKENDS)}"
+            )
+        if backend == "pyav" and av is None:
+            self.logger.warning("PyAV is not installed, falling back to FFmpeg decoder")
+            return "ffmpeg"
+        if backend == "auto":
+            return "pyav" if av is not None else "ffmpeg"
+        return backend
+
+    def decode(self, audio_bytes: bytes, content_type: Optional[str] = None) -> np.ndarray:
+        """
+        Decode audio bytes to 16 kHz mono float32 samples.
+
+        Args:
+            audio_bytes: Uploaded audio in any container FFmpeg/libav understands
+            content_type: Declared content type; audio/L16 and PCM16 audio/wav
+                are parsed directly without a decoder
+
+        Returns:
+            1-D float32 NumPy array at 16 kHz
+
+        Raises:
+            AudioProcessingException: If the audio cannot be decoded
+        """
+        if not audio_bytes:
+            raise AudioProcessingException("Empty audio payload")
+
+        media_type, params = parse_content_type(content_type)
+        if media_type == L16_CONTENT_TYPE:
+            return parse_l16(audio_bytes, params)
+
+        # Fast path: plain PCM16 WAV needs no decoder at all (declared or sniffed)
+        samples = parse_pcm16_wav(audio_bytes)
+        if samples is not None:
+            return samples
+        if media_type in WAV_CONTENT_TYPES:
+            self.logger.debug("WAV upload is not PCM16, falling back to full decoder")
+
+        with self._slots:
+            if self.backend == "pyav":
+                return self._decode_pyav(audio_bytes)
+            return self._decode_ffmpeg(audio_bytes)
+
+    def _decode_pyav(self, audio_bytes: bytes) -> np.ndarray:
+        """Decode in-process with libav through PyAV (no fork/exec)."""
+        try:
+            resampler = av.AudioResampler(format="flt", layout="mono", rate=WHISPER_SAMPLE_RATE)
+            frames = []
+
+            with av.open(io.BytesIO(audio_bytes), mode="r") as container:
+                for frame in container.decode(audio=0):
+                    for resampled in resampler.resample(frame):
+                        frames.append(resampled.to_ndarray().reshape(-1))
+                for resampled in resampler.resample(None):
+                    frames.append(resampled.to_ndarray().reshape(-1))
+
+            if not frames:
+                return np.zeros(0, dtype=np.float32)
+            return np.concatenate(frames).astype(np.float32, copy=False)
+
+        except Exception as e:
+            error_msg = f"PyAV decoding failed: {str(e)}"
+            self.logger.error(error_msg)
+            raise AudioProcessingException("Audio decoding failed", error_msg)
+
+    def _decode_ffmpeg(self, audio_bytes: bytes) -> np.ndarray:
+        """Decode by piping through a single FFmpeg process into memory."""
+        ffmpeg_command = [
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-ac", "1",
+            "-ar", str(WHISPER_SAMPLE_RATE),
+            "-f", "f32le",
+            "pipe:1"
+        ]
+
+        try:
+            process = subprocess.run(
+                ffmpeg_command,
+                input=audio_bytes,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        except Exception as e:
+            raise AudioProcessingException("Failed to decode audio", str(e))
+
+        if process.returncode != 0:
+            error_msg = f"FFmpeg decoding failed: {process.stderr.decode(errors='replace')}"
+            self.logger.error(error_msg)
+            raise AudioProcessingException("Audio decoding failed", error_msg)
+
+        return np.frombuffer(process.stdout, dtype=np.float32)
+
+
+# Global decoder instance
+_audio_decoder: Optional[AudioDecoder] = None
+
+
+def get_audio_decoder() -> AudioDecoder:
+    """Get the global audio decoder instance."""
+    global _audio_decoder
+    if _audio_decoder is None:
+        _audio_decoder = AudioDecoder()
+    return _audio_decoder
@@ -0,0 +1,95 @@
+"""
+Background compaction of long conversations.
+Once a history grows past a token threshold, its older exchanges are
+summarized by the LLM on a worker thread and later swapped for the summary,
+so prompts (and prefill time) stay short without dropping context.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from ..utils.logger import get_llm_logger
+from ..utils.metrics import get_metrics
+from .conversation_store import ConversationManager
+
+
+_SUMMARY_INSTRUCTIONS = (
+    "You maintain the memory of a conversation between a user and the assistant "
+    "Jarv1s. Write a concise summary of the conversation below that keeps every "
+    "fact, name, preference, decision and open question needed to continue it. "
+    "Write it in the language of the conversation, as plain prose, with no preamble."
+)
+
+
+def build_summary_request(
+    previous_summary: Optional[str],
+    messages: List[Dict[str, str]]
+) -> List[Dict[str, str]]:
+    """Build the chat messages asking the LLM to fold messages into the summary."""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    if previous_summary:
+        transcript = f"Summary so far:\n{previous_summary}\n\nContinuation:\n{transcript}"
+    return [
+        {"role": "system", "content": _SUMMARY_INSTRUCTIONS},
+        {"role": "user", "content": transcript}
+    ]
+
+
+class ConversationCompactor:
+    """Schedules summarization of old turns off the request path, one at a time."""
+
+    def __init__(
+        self,
+        complete: Callable[[List[Dict[str, str]]], str],
+        threshold_tokens: int,
+        keep_recent_pairs: int
+    ):
+        self.complete = complete
+        self.threshold_tokens = threshold_tokens
+        self.keep_recent_pairs = keep_recent_pairs
+        self.logger = get_llm_logger()
+        # A single worker: summaries never compete with each other for the LLM
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jarv1s-compaction")
+
+    def maybe_schedule(self, conversation: ConversationManager) -> bool:
+        """Start compacting a conversation if it is over the threshold and not already compacting."""
+        if conversation.compacting or conversation.total_tokens <= self.threshold_tokens:
+            return False
+
+        messages = conversation.compaction_candidates(self.keep_recent_pairs)
+        if not messages:
+            return False
+
+        conversation.compacting = True
+        self._executor.submit(self._compact, conversation, conversation.summary, messages)
+        get_metrics().increment("llm.compaction.runs")
+        return True
+
+    def _compact(
+        self,
+        conversation: ConversationManager,
+        previous_summary: Optional[str],
+        messages: List[Dict[str, str]]
+    ) -> None:
+        """Summarize messages and offer the result to the conversation."""
+        start_time = time.time()
+        try:
+            summary = self.complete(build_summary_request(previous_summary, messages)).strip()
+            if not summary:
+                raise ValueError("empty summary")
+        except Exception as e:
+            self.logger.warning(f"Conversation compaction failed: {e}")
+            get_metrics().increment("llm.compaction.failures")
+            conversation.compacting = False
+            return
+
+        get_metrics().observe("llm.compaction.duration_seconds", time.time() - start_time)
+        self.logger.info(
+            f"Summarized {len(messages)} messages of session '{conversation.session_id}'"
+        )
+        conversation.offer_summary(summary, messages)
+
+    def shutdown(self) -> None:
+        """Drop queued compactions; a running one finishes in the background."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,224 @@
+"""
+Durable storage for conversation history.
+Pluggable backends behind ConversationManager; the SQLite backend keeps an
+append-only message table in WAL mode and writes through a batched background
+thread so the interaction path never waits on disk.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from ..utils.exceptions import ConfigurationException
+from ..utils.logger import get_llm_logger
+from ..utils.metrics import get_metrics
+
+
+# Marker row: messages before it belong to a reset conversation
+RESET_ROLE = "reset"
+# Marker row holding a compaction summary; it replaces every earlier message
+SUMMARY_ROLE = "summary"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+"""
+
+
+class ConversationBackend(ABC):
+    """Storage for per-session conversation messages."""
+
+    @abstractmethod
+    def load(self, session_id: str, limit: int) -> List[Dict[str, str]]:
+        """
+        Load up to the last `limit` messages since the session's last reset.
+
+        If the conversation was compacted since, the result starts with a
+        SUMMARY_ROLE message followed by the messages that came after it.
+        """
+
+    @abstractmethod
+    def append(self, session_id: str, role: str, content: str) -> None:
+        """Record a message; must not block on I/O."""
+
+    def reset(self, session_id: str) -> None:
+        """Start a fresh conversation for the session."""
+        self.append(session_id, RESET_ROLE, "")
+
+    def compact(self, session_id: str, summary: str, messages: List[Dict[str, str]]) -> None:
+        """Replace the stored history with a summary followed by the messages kept verbatim."""
+        self.append(session_id, SUMMARY_ROLE, summary)
+        for message in messages:
+            self.append(session_id, message["role"], message["content"])
+
+    def close(self) -> None:
+        """Flush pending writes and release resources."""
+
+
+_Row = Tuple[str, str, str, float]
+
+
+class SQLiteConversationBackend(ConversationBackend):
+    """Append-only SQLite message log with a batched background writer."""
+
+    def __init__(self, path: str, batch_size: int = 64, flush_interval_ms: float = 50.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.logger = get_llm_logger()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._reader = self._connect()
+        self._reader.executescript(_SCHEMA)
+        self._reader_lock = threading.Lock()
+
+        self._queue: "queue.Queue[Optional[_Row]]" = queue.Queue()
+        # Per-session count of queued rows, so a reload waits for its own writes
+        self._pending: Dict[str, int] = defaultdict(int)
+        self._pending_changed = threading.Condition()
+        self._closed = False
+
+        self._writer = threading.Thread(
+            target=self._write_loop, name="jarv1s-conversation-writer", daemon=True
+        )
+        self._writer.start()
+        self.logger.info(f"Conversation history persisted to {path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: durable across process crashes, fsync only at checkpoints
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def load(self, session_id: str, limit: int) -> List[Dict[str, str]]:
+        if self._closed:
+            return []
+        self._wait_for_pending(session_id)
+
+        with self._reader_lock:
+            marker = self._reader.execute(
+                "SELECT id, role, content FROM messages "
+                "WHERE session_id = ? AND role IN (?, ?) ORDER BY id DESC LIMIT 1",
+                (session_id, RESET_ROLE, SUMMARY_ROLE)
+            ).fetchone()
+            rows = self._reader.execute(
+                "SELECT role, content FROM messages "
+                "WHERE session_id = ? AND id > ? ORDER BY id DESC LIMIT ?",
+                (session_id, marker[0] if marker else 0, limit)
+            ).fetchall()
+
+        messages = [{"role": role, "content": content} for role, content in reversed(rows)]
+        if marker is not None and marker[1] == SUMMARY_ROLE:
+            messages.insert(0, {"role": SUMMARY_ROLE, "content": marker[2]})
+        if messages:
+            get_metrics().increment("llm.persistence.rehydrations")
+        return messages
+
+    def append(self, session_id: str, role: str, content: str) -> None:
+        if self._closed:
+            return
+        with self._pending_changed:
+            self._pending[session_id] += 1
+        self._queue.put((session_id, role, content, time.time()))
+
+    def _wait_for_pending(self, session_id: str, timeout: float = 5.0) -> None:
+        """Block until the session's queued rows are committed (only after a quick evict/reload)."""
+        with self._pending_changed:
+            self._pending_changed.wait_for(lambda: not self._pending.get(session_id), timeout)
+
+    def _write_loop(self) -> None:
+        """Commit queued rows in batches of up to batch_size per transaction."""
+        connection = self._connect()
+        metrics = get_metrics()
+
+        while True:
+            row = self._queue.get()
+            if row is None:
+                break
+
+            batch: List[_Row] = [row]
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is None:
+                    stop = True
+                    break
+                batch.append(row)
+
+            try:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO messages (session_id, role, content, created_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        batch
+                    )
+                metrics.increment("llm.persistence.rows_written", len(batch))
+                metrics.observe("llm.persistence.batch_size", len(batch))
+            except sqlite3.Error as e:
+                self.logger.error(f"Failed to persist {len(batch)} conversation messages: {e}")
+                metrics.increment("llm.persistence.write_errors")
+
+            with self._pending_changed:
+                for session_id, _, _, _ in batch:
+                    self._pending[session_id] -= 1
+                    if not self._pending[session_id]:
+                        del self._pending[session_id]
+                self._pending_changed.notify_all()
+
+            if stop:
+                break
+
+        connection.close()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join(timeout=10)
+        with self._reader_lock:
+            self._reader.close()
+
+
+def create_conversation_backend(
+    backend: str,
+    path: str,
+    batch_size: int,
+    flush_interval_ms: float
+) -> Optional[ConversationBackend]:
+    """
+    Create the persistence backend selected by LLM_PERSISTENCE_BACKEND.
+
+    Raises:
+        ConfigurationException: If the backend name is unknown
+    """
+    if backend == "memory":
+        return None
+    if backend == "sqlite":
+        return SQLiteConversationBackend(path, batch_size, flush_interval_ms)
+    raise ConfigurationException(
+        f"Unknown conversation persistence backend '{backend}'",
+        "Expected 'sqlite' or 'memory'"
+    )
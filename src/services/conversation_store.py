@@ -0,0 +1,392 @@
+"""
+Session-scoped conversation state for the LLM service.
+Keeps one ConversationManager per client session in a bounded in-memory
+store with LRU/TTL eviction and a per-session lock.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..utils.logger import get_llm_logger
+from ..utils.metrics import get_metrics
+from ..utils.singleflight import SingleFlight
+from .conversation_persistence import SUMMARY_ROLE, ConversationBackend
+from .executors import get_stage_executor
+from .tokenizer import MESSAGE_OVERHEAD_TOKENS, HeuristicTokenizer, Tokenizer
+
+
+# Session used by callers that do not identify themselves (CLI, legacy clients)
+DEFAULT_SESSION_ID = "default"
+
+# "sliding" trims pair by pair every turn; "stable_prefix" keeps the prompt
+# prefix byte-identical between turns so the LLM server can reuse its KV cache
+HISTORY_MODES = ("sliding", "stable_prefix")
+
+# Rough per-message overhead of the dict and strings beyond the text itself
+_MESSAGE_OVERHEAD_BYTES = 200
+
+
+class ConversationManager:
+    """Manages conversation history and context."""
+
+    def __init__(
+        self,
+        system_prompt: str,
+        max_history_pairs: int = 5,
+        session_id: str = DEFAULT_SESSION_ID,
+        backend: Optional[ConversationBackend] = None,
+        token_budget: int = 0,
+        tokenizer: Optional[Tokenizer] = None,
+        stable_prefix: bool = False,
+        trim_target_ratio: float = 0.5
+    ):
+        self.system_prompt = system_prompt
+        # Either bound may be 0 (disabled); trimming honours both
+        self.max_history_pairs = max_history_pairs
+        self.token_budget = token_budget
+        self.tokenizer = tokenizer or HeuristicTokenizer()
+        # Stable-prefix mode: the leading messages change only at rare block trims,
+        # which then cut the history down to trim_target_ratio of its bounds
+        self.stable_prefix = stable_prefix
+        self.trim_target_ratio = trim_target_ratio
+        self._last_prompt: List[Dict[str, str]] = []
+        self.session_id = session_id
+        self.backend = backend
+        # Summary of compacted turns, carried in the system message
+        self.summary: Optional[str] = None
+        # Set while a background compaction of this conversation is running
+        self.compacting = False
+        self._pending_summary: Optional[Tuple[str, List[Dict[str, str]]]] = None
+        self.history: List[Dict[str, str]] = []
+        # Token cost of each history message, counted once when it is added
+        self._token_counts: List[int] = []
+        self.total_tokens = 0
+        self._add(self._system_message())
+
+        if backend is not None:
+            # Rehydrate whole exchanges, only as many as trim_history could keep (-1: no limit)
+            bounds = [
+                bound for bound in
+                (max_history_pairs, token_budget // (2 * MESSAGE_OVERHEAD_TOKENS)) if bound > 0
+            ]
+            limit = 2 * min(bounds) if bounds else -1
+            messages = backend.load(session_id, limit=limit)
+            if messages and messages[0]["role"] == SUMMARY_ROLE:
+                self._set_summary(messages.pop(0)["content"])
+            for message in messages:
+                self._add(message)
+            self.trim_history()
+
+    def _system_message(self) -> Dict[str, str]:
+        content = self.system_prompt
+        if self.summary:
+            content += f"\n\nSummary of the earlier conversation:\n{self.summary}"
+        return {"role": "system", "content": content}
+
+    def _count(self, message: Dict[str, str]) -> int:
+        return self.tokenizer.count(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+    def _add(self, message: Dict[str, str]) -> None:
+        tokens = self._count(message)
+        self.history.append(message)
+        self._token_counts.append(tokens)
+        self.total_tokens += tokens
+
+    def _set_summary(self, summary: Optional[str]) -> None:
+        """Replace the summary and re-measure the system message."""
+        self.summary = summary
+        self.history[0] = self._system_message()
+        tokens = self._count(self.history[0])
+        self.total_tokens += tokens - self._token_counts[0]
+        self._token_counts[0] = tokens
+
+    def _append(self, role: str, message: str) -> None:
+        self._add({"role": role, "content": message})
+        if self.backend is not None:
+            self.backend.append(self.session_id, role, message)
+
+    def add_user_message(self, message: str) -> None:
+        """Add a user message to the conversation history."""
+        self._append("user", message)
+
+    def add_assistant_message(self, message: str) -> None:
+        """Add an assistant message to the conversation history."""
+        self._append("assistant", message)
+
+    def get_messages(self) -> List[Dict[str, str]]:
+        """Get the current conversation messages."""
+        # A summary finished in the background is swapped in before the next request;
+        # in stable-prefix mode it waits for the next block trim instead
+        if not self.stable_prefix:
+            self.apply_pending_summary()
+        return self.history.copy()
+
+    def record_prompt(self, messages: List[Dict[str, str]]) -> None:
+        """Report how many prompt tokens repeat the previous prompt's prefix (KV-cache reuse)."""
+        shared = 0
+        for previous, message in zip(self._last_prompt, messages):
+            if previous != message:
+                break
+            shared += 1
+
+        prompt_tokens = reused_tokens = 0
+        for index, message in enumerate(messages):
+            in_history = index < len(self.history) and self.history[index] is message
+            tokens = self._token_counts[index] if in_history else self._count(message)
+            prompt_tokens += tokens
+            if index < shared:
+                reused_tokens += tokens
+        self._last_prompt = messages
+
+        metrics = get_metrics()
+        metrics.increment("llm.prefix.prompt_tokens", prompt_tokens)
+        metrics.increment("llm.prefix.reused_tokens", reused_tokens)
+        if prompt_tokens:
+            metrics.observe("llm.prefix.reuse_ratio", reused_tokens / prompt_tokens)
+
+    def compaction_candidates(self, keep_recent_pairs: int) -> List[Dict[str, str]]:
+        """Messages a compaction would summarize: all but the most recent exchanges."""
+        end = len(self.history) - keep_recent_pairs * 2
+        return self.history[1:end] if end > 1 else []
+
+    def offer_summary(self, summary: str, replaced: List[Dict[str, str]]) -> None:
+        """Hand over a finished summary of `replaced`; applied on the conversation's own turn."""
+        self._pending_summary = (summary, replaced)
+
+    def apply_pending_summary(self) -> bool:
+        """
+        Swap the summarized messages for their summary.
+
+        The summary is dropped if those messages are no longer the oldest in
+        the history (trimmed or reset while it was being written).
+        """
+        pending, self._pending_summary = self._pending_summary, None
+        if pending is None:
+            return False
+        self.compacting = False
+
+        summary, replaced = pending
+        count = len(replaced)
+        current = self.history[1:1 + count]
+        if len(current) != count or any(a is not b for a, b in zip(current, replaced)):
+            get_metrics().increment("llm.compaction.discarded")
+            return False
+
+        before = self.total_tokens
+        self.total_tokens -= sum(self._token_counts[1:1 + count])
+        del self.history[1:1 + count]
+        del self._token_counts[1:1 + count]
+        self._set_summary(summary)
+        if self.backend is not None:
+            self.backend.compact(self.session_id, summary, self.history[1:])
+
+        get_metrics().increment("llm.compaction.applied")
+        get_metrics().observe("llm.compaction.tokens_saved", before - self.total_tokens)
+        return True
+
+    def trim_history(self) -> None:
+        """Drop the oldest exchanges until the history fits its pair and token bounds."""
+        pair_limit, token_limit = self.max_history_pairs, self.token_budget
+        if self.stable_prefix:
+            over_pairs = pair_limit and len(self.history) - 1 > pair_limit * 2
+            over_tokens = token_limit and self.total_tokens > token_limit
+            if not (over_pairs or over_tokens):
+                return
+            # One large cut (plus any pending summary) instead of one per turn
+            self.apply_pending_summary()
+            pair_limit = max(1, int(pair_limit * self.trim_target_ratio)) if pair_limit else 0
+            token_limit = int(token_limit * self.trim_target_ratio)
+        else:
+            self.apply_pending_summary()
+
+        turns = len(self.history) - 1  # excluding the system prompt
+        drop = 0
+        if pair_limit:
+            drop = max(0, turns - pair_limit * 2)
+
+        if token_limit:
+            # Cached counts make this proportional to the messages dropped
+            tokens = self.total_tokens - sum(self._token_counts[1:1 + drop])
+            # The most recent exchange is always kept, even if it alone is over budget
+            while tokens > token_limit and drop < turns - 2:
+                pair = self._token_counts[1 + drop:3 + drop]
+                tokens -= sum(pair)
+                drop += len(pair)
+
+        if drop:
+            self.total_tokens -= sum(self._token_counts[1:1 + drop])
+            del self.history[1:1 + drop]
+            del self._token_counts[1:1 + drop]
+            get_metrics().increment("llm.history.trimmed_messages", drop)
+
+    def reset(self) -> None:
+        """Reset conversation to just the system prompt."""
+        self.history = self.history[:1]
+        self._token_counts = self._token_counts[:1]
+        self.total_tokens = self._token_counts[0]
+        self._set_summary(None)
+        self._last_prompt = []
+        if self.backend is not None:
+            self.backend.reset(self.session_id)
+
+    def get_conversation_length(self) -> int:
+        """Get the number of message pairs (excluding system prompt)."""
+        return (len(self.history) - 1) // 2
+
+    def size_bytes(self) -> int:
+        """Approximate memory held by the history."""
+        return sum(
+            len(message["content"].encode("utf-8")) + _MESSAGE_OVERHEAD_BYTES
+            for message in self.history
+        )
+
+
+@dataclass
+class ConversationSession:
+    """One client's conversation plus the lock serializing its turns."""
+    session_id: str
+    conversation: ConversationManager
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_access: float = field(default_factory=time.monotonic)
+    size_bytes: int = 0
+
+
+class ConversationStore:
+    """Bounded session -> conversation map with LRU/TTL eviction and O(1) lookup."""
+
+    def __init__(
+        self,
+        factory: Callable[[str], ConversationManager],
+        max_sessions: int,
+        ttl_seconds: float,
+        max_bytes: int
+    ):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.logger = get_llm_logger()
+        self._lock = threading.Lock()
+        # Access order: least recently used first
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._bytes = 0
+        # Concurrent first requests of one session share a single rehydration
+        self._building = SingleFlight("llm.sessions")
+
+    def get(self, session_id: Optional[str] = None) -> ConversationSession:
+        """Get a session's conversation, creating it (or replacing an expired one)."""
+        session_id = session_id or DEFAULT_SESSION_ID
+        session = self._lookup(session_id)
+        if session is None:
+            session = self._insert(session_id, self._build(session_id))
+        return session
+
+    async def get_async(self, session_id: Optional[str] = None) -> ConversationSession:
+        """Like get, but a session that must be built is rehydrated off the event loop."""
+        session_id = session_id or DEFAULT_SESSION_ID
+        session = self._lookup(session_id)
+        if session is None:
+            conversation = await get_stage_executor("llm").run(self._build, session_id)
+            session = self._insert(session_id, conversation)
+        return session
+
+    def _build(self, session_id: str) -> ConversationManager:
+        """Create a conversation, rehydrating it from the backend (outside the store lock)."""
+        conversation, _ = self._building.do(session_id, lambda: self.factory(session_id))
+        return conversation
+
+    def _lookup(self, session_id: str) -> Optional[ConversationSession]:
+        """Return a live session and mark it used, or None if it must be built."""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            # A session with a turn in progress is still live, however long the turn runs
+            if now - session.last_access > self.ttl_seconds and not session.lock.locked():
+                self._remove(session_id)
+                return None
+
+            self._sessions.move_to_end(session_id)
+            session.last_access = now
+            self._evict(keep=session_id, now=now)
+            return session
+
+    def _insert(self, session_id: str, conversation: ConversationManager) -> ConversationSession:
+        """Register a freshly built conversation, unless a concurrent caller already did."""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            else:
+                session = ConversationSession(session_id, conversation)
+                session.size_bytes = conversation.size_bytes()
+                self._sessions[session_id] = session
+                self._bytes += session.size_bytes
+                get_metrics().increment("llm.sessions.created")
+
+            session.last_access = now
+            self._evict(keep=session_id, now=now)
+            return session
+
+    def update_size(self, session: ConversationSession) -> None:
+        """Re-measure a session after its history changed and enforce the memory ceiling."""
+        size = session.conversation.size_bytes()
+        with self._lock:
+            if self._sessions.get(session.session_id) is not session:
+                return
+            self._bytes += size - session.size_bytes
+            session.size_bytes = size
+            self._evict(keep=session.session_id, now=time.monotonic())
+
+    def discard(self, session_id: str) -> None:
+        """Forget a session."""
+        with self._lock:
+            if session_id in self._sessions:
+                self._remove(session_id)
+
+    def _remove(self, session_id: str) -> None:
+        """Drop a session (caller holds the lock)."""
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.size_bytes
+
+    def _evict(self, keep: str, now: float) -> None:
+        """Expire idle sessions and enforce the count/memory bounds (caller holds the lock)."""
+        metrics = get_metrics()
+
+        # Oldest accesses are at the front, so expiry stops at the first live session;
+        # sessions with a turn in progress are skipped
+        expired = []
+        for session_id, session in self._sessions.items():
+            if now - session.last_access <= self.ttl_seconds:
+                break
+            if session_id != keep and not session.lock.locked():
+                expired.append(session_id)
+        for session_id in expired:
+            self._remove(session_id)
+            metrics.increment("llm.sessions.expired")
+
+        while len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes:
+            # Sessions with a turn in progress are skipped
+            victim = next(
+                (
+                    session_id for session_id, session in self._sessions.items()
+                    if session_id != keep and not session.lock.locked()
+                ),
+                None
+            )
+            if victim is None:
+                break
+            self._remove(victim)
+            metrics.increment("llm.sessions.evicted")
+
+        metrics.set_gauge("llm.sessions.active", len(self._sessions))
+        metrics.set_gauge("llm.sessions.memory_bytes", self._bytes)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -0,0 +1,87 @@
+"""
+Per-stage executors for blocking model inference.
+Keeps CTranslate2/onnxruntime calls off the asyncio event loop with bounded thread pools.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, TypeVar
+
+from ..config.settings import get_settings
+from ..utils.logger import get_api_logger
+
+
+T = TypeVar("T")
+
+# Sentinel returned by next() when the wrapped iterator is exhausted
+_EXHAUSTED = object()
+
+
+class StageExecutor:
+    """Bounded thread pool dedicated to one pipeline stage (STT, TTS, ...)."""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"jarv1s-{name}"
+        )
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking callable on this stage's pool and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def iterate(self, iterator: Iterator[T]) -> AsyncIterator[T]:
+        """Consume a blocking iterator on this stage's pool, one item at a time."""
+        while True:
+            item = await self.run(next, iterator, _EXHAUSTED)
+            if item is _EXHAUSTED:
+                break
+            yield item
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Shut down the underlying thread pool."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+# Global executor registry
+_executors: Dict[str, StageExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _get_pool_size(stage: str) -> int:
+    """Resolve the configured pool size for a stage."""
+    executor_settings = get_settings().executor
+    pool_sizes = {
+        "stt": executor_settings.stt_pool_size,
+        "tts": executor_settings.tts_pool_size,
+    }
+    return pool_sizes.get(stage, executor_settings.default_pool_size)
+
+
+def get_stage_executor(stage: str) -> StageExecutor:
+    """Get (or lazily create) the executor for a pipeline stage."""
+    executor: Optional[StageExecutor] = _executors.get(stage)
+    if executor is not None:
+        return executor
+
+    with _executors_lock:
+        if stage not in _executors:
+            pool_size = _get_pool_size(stage)
+            _executors[stage] = StageExecutor(stage, pool_size)
+            get_api_logger().info(f"Created '{stage}' executor with {pool_size} workers")
+        return _executors[stage]
+
+
+def shutdown_executors() -> None:
+    """Shut down all stage executors (called on application shutdown)."""
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
@@ -3,52 +3,19 @@ Large Language Model service using LiteLLM.
 Handles conversation management with memory and robust error handling.
 """
 
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import AsyncIterator, Iterator, List, Dict, Any, Optional
 import litellm
 
 from ..config.settings import get_settings
 from ..utils.logger import get_llm_logger
-from ..utils.exceptions import LLMException
-
-
-class ConversationManager:
-    """Manages conversation history and context."""
-    
-    def __init__(self, system_prompt: str, max_history_pairs: int = 5):
-        self.system_prompt = system_prompt
-        self.max_history_pairs = max_history_pairs
-        self.history: List[Dict[str, str]] = [
-            {"role": "system", "content": system_prompt}
-        ]
-    
-    def add_user_message(self, message: str) -> None:
-        """Add a user message to the conversation history."""
-        self.history.append({"role": "user", "content": message})
-    
-    def add_assistant_message(self, message: str) -> None:
-        """Add an assistant message to the conversation history."""
-        self.history.append({"role": "assistant", "content": message})
-    
-    def get_messages(self) -> List[Dict[str, str]]:
-        """Get the current conversation messages."""
-        return self.history.copy()
-    
-    def trim_history(self) -> None:
-        """Trim conversation history to maintain reasonable size."""
-        # Keep system prompt + last N pairs of conversation
-        max_messages = 1 + (self.max_history_pairs * 2)  # system + user/assistant pairs
-        
-        if len(self.history) > max_messages:
-            # Keep system prompt and last N pairs
-            self.history = [self.history[0]] + self.history[-(max_messages-1):]
-    
-    def reset(self) -> None:
-        """Reset conversation to just the system prompt."""
-        self.history = [{"role": "system", "content": self.system_prompt}]
-    
-    def get_conversation_length(self) -> int:
-        """Get the number of message pairs (excluding system prompt)."""
-        return (len(self.history) - 1) // 2
+from ..utils.exceptions import ConfigurationException, LLMException
+from .conversation_compaction import ConversationCompactor
+from .conversation_persistence import create_conversation_backend
+from .tokenizer import create_tokenizer
+from .conversation_store import (
+    HISTORY_MODES, ConversationManager, ConversationSession, ConversationStore
+)
 
 
 class LLMService:
@@ -58,33 +25,111 @@ class LLMService:
         self.settings = get_settings().llm
         self.logger = get_llm_logger()
         
-        # Initialize conversation manager
-        system_prompt = (
+        # Conversations are kept per client session
+        self.system_prompt = (
             "You are Jarv1s, a personal AI copilot. Your responses are always "
             "concise, helpful, and friendly. You remember previous conversation "
             "context to provide coherent responses. Respond in the same language "
             "the user is using."
         )
         
-        self.conversation = ConversationManager(
-            system_prompt=system_prompt,
-            max_history_pairs=self.settings.max_history_pairs
+        # History is written behind the hot path and read back on first access
+        self.backend = create_conversation_backend(
+            self.settings.persistence_backend,
+            self.settings.persistence_path,
+            batch_size=self.settings.persistence_batch_size,
+            flush_interval_ms=self.settings.persistence_flush_ms
+        )
+        
+        if self.settings.history_mode not in HISTORY_MODES:
+            raise ConfigurationException(
+                f"Unknown history mode '{self.settings.history_mode}'",
+                f"Expected one of: {', '.join(HISTORY_MODES)}"
+            )
+        stable_prefix = self.settings.history_mode == "stable_prefix"
+        
+        # llama.cpp-style servers keep the KV cache of a reused prompt prefix
+        self._cache_hints: Dict[str, Any] = {}
+        if stable_prefix and self.settings.prompt_cache_hints:
+            self._cache_hints = {"extra_body": {"cache_prompt": True}}
+        
+        # Shared by every session; counts are cached per message
+        self.tokenizer = create_tokenizer(self.settings.tokenizer, self.settings.model_name)
+        
+        self.conversations = ConversationStore(
+            factory=lambda session_id: ConversationManager(
+                system_prompt=self.system_prompt,
+                max_history_pairs=self.settings.max_history_pairs,
+                session_id=session_id,
+                backend=self.backend,
+                token_budget=self.settings.history_token_budget,
+                tokenizer=self.tokenizer,
+                stable_prefix=stable_prefix,
+                trim_target_ratio=self.settings.trim_target_ratio
+            ),
+            max_sessions=self.settings.session_max_count,
+            ttl_seconds=self.settings.session_ttl_seconds,
+            max_bytes=self.settings.session_memory_max_mb * 1024 * 1024
+        )
+        
+        # Optional: summarize old turns instead of only truncating them
+        self.compactor: Optional[ConversationCompactor] = None
+        if self.settings.compaction_enabled:
+            self.compactor = ConversationCompactor(
+                lambda messages: self._make_llm_request(
+                    messages, max_tokens=self.settings.compaction_summary_max_tokens
+                ),
+                threshold_tokens=self.settings.compaction_threshold_tokens,
+                keep_recent_pairs=self.settings.compaction_keep_recent_pairs
+            )
+        
+        # Bounds concurrent async requests to the local LLM server
+        self._request_semaphore = asyncio.Semaphore(
+            get_settings().executor.llm_max_concurrency
         )
         
         self.logger.info("LLM service initialized")
     
-    def _make_llm_request(self, messages: List[Dict[str, str]]) -> str:
-        """Make a request to the LLM service."""
+    @property
+    def conversation(self) -> ConversationManager:
+        """Conversation of the default session (single-user callers such as the CLI)."""
+        return self.conversations.get().conversation
+    
+    def _request_kwargs(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Build the keyword arguments shared by sync and async LLM requests."""
+        return {
+            "model": self.settings.provider,
+            "messages": messages,
+            "api_base": self.settings.api_base,
+            "api_key": self.settings.api_key,
+            "temperature": self.settings.temperature,
+            **self._cache_hints
+        }
+    
+    def _make_llm_request(self, messages: List[Dict[str, str]], **options: Any) -> str:
+        """Make a request to the LLM service (options override request parameters)."""
         try:
             self.logger.debug(f"Making LLM request with {len(messages)} messages")
             
-            response = litellm.completion(
-                model=self.settings.provider,
-                messages=messages,
-                api_base=self.settings.api_base,
-                api_key=self.settings.api_key,
-                temperature=self.settings.temperature
-            )
+            response = litellm.completion(**{**self._request_kwargs(messages), **options})
+            
+            response_text = response.choices[0].message.content.strip()
+            self.logger.debug(f"LLM response received: {len(response_text)} characters")
+            
+            return response_text
+            
+        except Exception as e:
+            error_msg = f"LLM request failed: {str(e)}"
+            self.logger.error(error_msg)
+            raise LLMException(error_msg, str(e))
+    
+    async def _make_llm_request_async(self, messages: List[Dict[str, str]]) -> str:
+        """Make a non-blocking request to the LLM service."""
+        try:
+            self.logger.debug(f"Making async LLM request with {len(messages)} messages")
+            
+            async with self._request_semaphore:
+                response = await litellm.acompletion(**self._request_kwargs(messages))
             
             response_text = response.choices[0].message.content.strip()
             self.logger.debug(f"LLM response received: {len(response_text)} characters")
@@ -96,12 +141,139 @@ class LLMService:
             self.logger.error(error_msg)
             raise LLMException(error_msg, str(e))
     
-    def get_response(self, user_input: str) -> str:
+    @staticmethod
+    def _extract_delta(chunk: Any) -> str:
+        """Extract the text delta from a streamed completion chunk."""
+        choices = getattr(chunk, "choices", None)
+        if not choices:
+            return ""
+        delta = getattr(choices[0], "delta", None)
+        return getattr(delta, "content", None) or ""
+    
+    def _finish_turn(self, session: ConversationSession) -> None:
+        """Trim the history after an exchange and compact it in the background if it grew long."""
+        session.conversation.trim_history()
+        if self.compactor is not None:
+            self.compactor.maybe_schedule(session.conversation)
+        self.conversations.update_size(session)
+    
+    def _commit_exchange(
+        self,
+        session: ConversationSession,
+        user_input: str,
+        parts: List[str]
+    ) -> str:
+        """Commit a completed streamed exchange into the session's history."""
+        response_text = "".join(parts).strip()
+        if not response_text:
+            raise LLMException("LLM returned an empty streamed response")
+        
+        session.conversation.add_user_message(user_input)
+        session.conversation.add_assistant_message(response_text)
+        self._finish_turn(session)
+        
+        self.logger.info(f"LLM streamed response completed: '{response_text}'")
+        return response_text
+    
+    def stream_response(self, user_input: str, session_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream the LLM response for the given user input as text deltas.
+        
+        The exchange is only committed to the conversation history once the
+        stream completes; an abandoned or failed stream leaves it untouched.
+        
+        Args:
+            user_input: The user's message
+            session_id: Conversation session (defaults to the shared session)
+            
+        Yields:
+            Text deltas as the model generates them
+            
+        Raises:
+            LLMException: If the LLM request fails
+        """
+        if not user_input.strip():
+            raise LLMException("Empty user input provided")
+        
+        self.logger.info(f"Streaming response for user input: '{user_input}'")
+        
+        session = self.conversations.get(session_id)
+        messages = session.conversation.get_messages()
+        messages.append({"role": "user", "content": user_input})
+        session.conversation.record_prompt(messages)
+        parts: List[str] = []
+        
+        try:
+            response = litellm.completion(**self._request_kwargs(messages), stream=True)
+            for chunk in response:
+                delta = self._extract_delta(chunk)
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            error_msg = f"LLM streaming request failed: {str(e)}"
+            self.logger.error(error_msg)
+            raise LLMException(error_msg, str(e))
+        
+        self._commit_exchange(session, user_input, parts)
+    
+    async def stream_response_async(
+        self,
+        user_input: str,
+        session_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Async variant of stream_response that never blocks the event loop.
+        
+        Turns of the same session are serialized, so concurrent requests
+        never interleave their messages in the history.
+        
+        Args:
+            user_input: The user's message
+            session_id: Conversation session (defaults to the shared session)
+            
+        Yields:
+            Text deltas as the model generates them
+            
+        Raises:
+            LLMException: If the LLM request fails
+        """
+        if not user_input.strip():
+            raise LLMException("Empty user input provided")
+        
+        self.logger.info(f"Streaming response for user input: '{user_input}'")
+        
+        session = await self.conversations.get_async(session_id)
+        async with session.lock:
+            messages = session.conversation.get_messages()
+            messages.append({"role": "user", "content": user_input})
+            session.conversation.record_prompt(messages)
+            parts: List[str] = []
+            
+            try:
+                async with self._request_semaphore:
+                    response = await litellm.acompletion(
+                        **self._request_kwargs(messages), stream=True
+                    )
+                    async for chunk in response:
+                        delta = self._extract_delta(chunk)
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+            except Exception as e:
+                error_msg = f"LLM streaming request failed: {str(e)}"
+                self.logger.error(error_msg)
+                raise LLMException(error_msg, str(e))
+            
+            self._commit_exchange(session, user_input, parts)
+    
+    def get_response(self, user_input: str, session_id: Optional[str] = None) -> str:
         """
         Get a response from the LLM for the given user input.
         
         Args:
             user_input: The user's message
+            session_id: Conversation session (defaults to the shared session)
             
         Returns:
             The LLM's response text
@@ -114,21 +286,25 @@ class LLMService:
         
         self.logger.info(f"Processing user input: '{user_input}'")
         
+        session = self.conversations.get(session_id)
+        conversation = session.conversation
+        
         try:
             # Add user message to conversation
-            self.conversation.add_user_message(user_input)
+            conversation.add_user_message(user_input)
             
             # Get current messages for LLM
-            messages = self.conversation.get_messages()
+            messages = conversation.get_messages()
+            conversation.record_prompt(messages)
             
             # Make LLM request
             response_text = self._make_llm_request(messages)
             
             # Add assistant response to conversation
-            self.conversation.add_assistant_message(response_text)
+            conversation.add_assistant_message(response_text)
             
             # Trim history if needed
-            self.conversation.trim_history()
+            self._finish_turn(session)
             
             self.logger.info(f"LLM response generated: '{response_text}'")
             return response_text
@@ -141,21 +317,90 @@ class LLMService:
             self.logger.error(error_msg)
             raise LLMException(error_msg, str(e))
     
-    def reset_conversation(self) -> Dict[str, str]:
-        """Reset the conversation history."""
+    async def get_response_async(self, user_input: str, session_id: Optional[str] = None) -> str:
+        """
+        Async variant of get_response that never blocks the event loop.
+        
+        Args:
+            user_input: The user's message
+            session_id: Conversation session (defaults to the shared session)
+            
+        Returns:
+            The LLM's response text
+            
+        Raises:
+            LLMException: If the LLM request fails
+        """
+        if not user_input.strip():
+            raise LLMException("Empty user input provided")
+        
+        self.logger.info(f"Processing user input: '{user_input}'")
+        
+        session = await self.conversations.get_async(session_id)
+        
+        try:
+            # One turn at a time per session; the user message is only kept on success
+            async with session.lock:
+                messages = session.conversation.get_messages()
+                messages.append({"role": "user", "content": user_input})
+                session.conversation.record_prompt(messages)
+                
+                response_text = await self._make_llm_request_async(messages)
+                
+                session.conversation.add_user_message(user_input)
+                session.conversation.add_assistant_message(response_text)
+                self._finish_turn(session)
+            
+            self.logger.info(f"LLM response generated: '{response_text}'")
+            return response_text
+            
+        except LLMException:
+            raise
+        except Exception as e:
+            error_msg = f"Unexpected error in LLM service: {str(e)}"
+            self.logger.error(error_msg)
+            raise LLMException(error_msg, str(e))
+    
+    def reset_conversation(self, session_id: Optional[str] = None) -> Dict[str, str]:
+        """Reset the conversation history of one session."""
         self.logger.info("Resetting conversation history")
-        self.conversation.reset()
+        return self._reset_session(self.conversations.get(session_id))
+    
+    async def reset_conversation_async(self, session_id: Optional[str] = None) -> Dict[str, str]:
+        """Async variant of reset_conversation; waits for the session's turn in progress."""
+        self.logger.info("Resetting conversation history")
+        session = await self.conversations.get_async(session_id)
+        async with session.lock:
+            return self._reset_session(session)
+    
+    def _reset_session(self, session: ConversationSession) -> Dict[str, str]:
+        session.conversation.reset()
+        self.conversations.update_size(session)
         return {
             "status": "ok", 
             "message": "Conversation history reset successfully"
         }
     
-    def get_conversation_info(self) -> Dict[str, Any]:
-        """Get information about the current conversation."""
+    def get_conversation_info(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Get information about a session's conversation."""
+        return self._conversation_info(self.conversations.get(session_id))
+    
+    async def get_conversation_info_async(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of get_conversation_info; reports the history between turns."""
+        session = await self.conversations.get_async(session_id)
+        async with session.lock:
+            return self._conversation_info(session)
+    
+    def _conversation_info(self, session: ConversationSession) -> Dict[str, Any]:
+        conversation = session.conversation
         return {
-            "message_count": len(self.conversation.history),
-            "conversation_pairs": self.conversation.get_conversation_length(),
-            "max_history_pairs": self.settings.max_history_pairs
+            "message_count": len(conversation.history),
+            "conversation_pairs": conversation.get_conversation_length(),
+            "max_history_pairs": self.settings.max_history_pairs,
+            "history_tokens": conversation.total_tokens,
+            "history_token_budget": self.settings.history_token_budget,
+            "summarized": conversation.summary is not None,
+            "active_sessions": len(self.conversations)
         }
     
     def is_available(self) -> bool:
@@ -169,6 +414,25 @@ class LLMService:
             return len(response.strip()) > 0
         except Exception:
             return False
+    
+    async def is_available_async(self) -> bool:
+        """Non-blocking availability check, safe to call from request handlers."""
+        try:
+            test_messages = [
+                {"role": "system", "content": "You are a test assistant."},
+                {"role": "user", "content": "Say 'OK' if you can hear me."}
+            ]
+            response = await self._make_llm_request_async(test_messages)
+            return len(response.strip()) > 0
+        except Exception:
+            return False
+    
+    def shutdown(self) -> None:
+        """Stop background compaction and flush queued conversation writes."""
+        if self.compactor is not None:
+            self.compactor.shutdown()
+        if self.backend is not None:
+            self.backend.close()
 
 
 # Global service instance
@@ -183,19 +447,19 @@ def get_llm_service() -> LLMService:
     return _llm_service
 
 
-def get_llm_response(user_input: str) -> str:
+def get_llm_response(user_input: str, session_id: Optional[str] = None) -> str:
     """
     Convenience function for getting LLM responses.
     Maintains backward compatibility with existing code.
     """
     service = get_llm_service()
-    return service.get_response(user_input)
+    return service.get_response(user_input, session_id)
 
 
-def reset_conversation() -> Dict[str, str]:
+def reset_conversation(session_id: Optional[str] = None) -> Dict[str, str]:
     """
     Convenience function for resetting conversation.
     Maintains backward compatibility with existing code.
     """
     service = get_llm_service()
-    return service.reset_conversation()
\ No newline at end of file
+    return service.reset_conversation(session_id)
\ No newline at end of file
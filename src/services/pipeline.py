@@ -0,0 +1,193 @@
+"""
+Sentence-pipelined speech synthesis.
+Splits streaming LLM output at sentence/clause boundaries and synthesizes each
+segment while the LLM is still generating, emitting audio in order.
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Union
+
+from ..config.settings import get_settings
+from ..utils.logger import get_tts_logger
+from .executors import StageExecutor, get_stage_executor
+
+if TYPE_CHECKING:
+    # Imported lazily: the text segmentation here does not need Piper
+    from .tts_service import TTSService
+
+
+# Sentence terminators followed by whitespace (avoids splitting "3.5" or "v0.2")
+_SENTENCE_END = re.compile(r'[.!?…]+["\')\]»]*\s+|\n+')
+# Clause separators, only used once a segment is long enough
+_CLAUSE_END = re.compile(r'[,;:]\s+')
+
+
+class SentenceSegmenter:
+    """Incrementally splits streamed text into speakable segments."""
+
+    def __init__(self, min_clause_chars: int = 40, max_segment_chars: int = 200):
+        self.min_clause_chars = min_clause_chars
+        self.max_segment_chars = max_segment_chars
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """Add a text delta and return any segments that are now complete."""
+        self._buffer += delta
+        segments: List[str] = []
+
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                break
+            segment = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:]
+            if segment:
+                segments.append(segment)
+
+        return segments
+
+    def flush(self) -> List[str]:
+        """Return whatever text remains once the stream has ended."""
+        segment = self._buffer.strip()
+        self._buffer = ""
+        return [segment] if segment else []
+
+    def _find_cut(self) -> Optional[int]:
+        """Find the end offset of the next complete segment in the buffer."""
+        match = _SENTENCE_END.search(self._buffer)
+        if match:
+            return match.end()
+
+        if len(self._buffer) >= self.min_clause_chars:
+            clause_ends = [m.end() for m in _CLAUSE_END.finditer(self._buffer)]
+            clause_ends = [end for end in clause_ends if end >= self.min_clause_chars]
+            if clause_ends:
+                return clause_ends[0]
+
+        if len(self._buffer) >= self.max_segment_chars:
+            # No punctuation in sight: cut at the last word boundary
+            space = self._buffer.rfind(" ", 0, self.max_segment_chars)
+            return space + 1 if space > 0 else self.max_segment_chars
+
+        return None
+
+
+@dataclass
+class TextDelta:
+    """A text delta forwarded from the LLM stream."""
+    text: str
+
+
+@dataclass
+class AudioSegment:
+    """Synthesized PCM16 audio for one text segment, in playback order."""
+    index: int
+    text: str
+    pcm: bytes
+
+
+PipelineEvent = Union[TextDelta, AudioSegment]
+
+# Sentinel marking the end of a pipeline queue
+_DONE = object()
+
+
+class SentencePipeline:
+    """Overlaps TTS synthesis with LLM generation, one segment at a time."""
+
+    def __init__(
+        self,
+        tts_service: Optional["TTSService"] = None,
+        executor: Optional[StageExecutor] = None,
+        voice: Optional[str] = None
+    ):
+        from .tts_service import get_tts_service
+
+        tts_settings = get_settings().tts
+        self.tts_service = tts_service or get_tts_service()
+        self.executor = executor or get_stage_executor("tts")
+        self.voice = voice
+        self.min_clause_chars = tts_settings.segment_min_clause_chars
+        self.max_segment_chars = tts_settings.segment_max_chars
+        self.logger = get_tts_logger()
+
+    def _render_segment(self, text: str) -> bytes:
+        """Synthesize one segment to raw PCM (runs on the TTS executor)."""
+        return b"".join(self.tts_service.synthesize_stream_raw(text, self.voice))
+
+    async def run(self, deltas: AsyncIterator[str]) -> AsyncIterator[PipelineEvent]:
+        """
+        Consume LLM text deltas and yield text and audio events.
+
+        Text deltas are re-emitted immediately. Each completed segment is
+        submitted for synthesis as soon as it is detected, and its audio is
+        emitted strictly in segment order.
+
+        Args:
+            deltas: Async iterator of LLM text deltas
+
+        Yields:
+            TextDelta and AudioSegment events
+        """
+        segmenter = SentenceSegmenter(self.min_clause_chars, self.max_segment_chars)
+        events: asyncio.Queue = asyncio.Queue()
+        pending: asyncio.Queue = asyncio.Queue()
+
+        def submit(index: int, text: str) -> None:
+            self.logger.debug(f"Pipelining segment {index}: '{text}'")
+            future = asyncio.ensure_future(self.executor.run(self._render_segment, text))
+            pending.put_nowait((index, text, future))
+
+        async def produce() -> None:
+            index = 0
+            try:
+                async for delta in deltas:
+                    await events.put(TextDelta(delta))
+                    for segment in segmenter.feed(delta):
+                        submit(index, segment)
+                        index += 1
+                for segment in segmenter.flush():
+                    submit(index, segment)
+                    index += 1
+            finally:
+                pending.put_nowait(_DONE)
+
+        async def drain() -> None:
+            while True:
+                item = await pending.get()
+                if item is _DONE:
+                    break
+                index, text, future = item
+                await events.put(AudioSegment(index, text, await future))
+
+        producer = asyncio.create_task(produce())
+        consumer = asyncio.create_task(drain())
+        # Forward completion (or the first failure) of both tasks into the event queue
+        watcher = asyncio.ensure_future(asyncio.gather(producer, consumer))
+
+        def on_finished(future: asyncio.Future) -> None:
+            if not future.cancelled():
+                # Mark the exception as retrieved; it is re-raised below if still consumed
+                future.exception()
+            events.put_nowait(_DONE)
+
+        watcher.add_done_callback(on_finished)
+
+        try:
+            while True:
+                event = await events.get()
+                if event is _DONE:
+                    break
+                yield event
+            # Re-raise the first failure from either stage, if any
+            await watcher
+        finally:
+            for task in (producer, consumer):
+                task.cancel()
+            watcher.cancel()
+            while not pending.empty():
+                item = pending.get_nowait()
+                if item is not _DONE:
+                    item[2].cancel()
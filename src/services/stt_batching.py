@@ -0,0 +1,131 @@
+"""
+Cross-request micro-batching for STT inference.
+Collects VAD segments from concurrent requests within a short time window,
+runs them through the model as one batch and scatters the results back.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from ..utils.logger import get_stt_logger
+from ..utils.metrics import get_metrics
+from .audio_decoder import WHISPER_SAMPLE_RATE
+
+
+BatchFunction = Callable[[List[np.ndarray]], List[str]]
+
+
+@dataclass
+class _BatchJob:
+    """Segments of one request waiting for a batched inference pass."""
+    segments: List[np.ndarray]
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    done: threading.Event = field(default_factory=threading.Event)
+    results: Optional[List[str]] = None
+    error: Optional[BaseException] = None
+
+
+class STTBatchScheduler:
+    """Batches STT segments across concurrent requests on a dedicated thread."""
+
+    def __init__(self, batch_fn: BatchFunction, window_ms: float, max_batch_segments: int):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_segments = max_batch_segments
+        self.logger = get_stt_logger()
+        self._jobs: "queue.Queue[_BatchJob]" = queue.Queue()
+        self._worker = threading.Thread(
+            target=self._run, name="jarv1s-stt-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, segments: List[np.ndarray]) -> List[str]:
+        """
+        Queue a request's segments and block until their transcripts are ready.
+
+        Args:
+            segments: Audio segments of one request, in order
+
+        Returns:
+            One transcript per segment, in the same order
+        """
+        if not segments:
+            return []
+
+        job = _BatchJob(segments)
+        self._jobs.put(job)
+        job.done.wait()
+
+        if job.error is not None:
+            raise job.error
+        return job.results or []
+
+    def _collect(self, first: _BatchJob) -> List[_BatchJob]:
+        """Gather more jobs until the window closes or the batch is full."""
+        jobs = [first]
+        segment_count = len(first.segments)
+        deadline = time.perf_counter() + self.window
+
+        while segment_count < self.max_batch_segments:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                job = self._jobs.get(timeout=remaining)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            segment_count += len(job.segments)
+
+        return jobs
+
+    def _run(self) -> None:
+        """Worker loop: collect a batch, run it, scatter the results."""
+        metrics = get_metrics()
+
+        while True:
+            jobs = self._collect(self._jobs.get())
+            segments = [segment for job in jobs for segment in job.segments]
+            batch_start = time.perf_counter()
+
+            for job in jobs:
+                metrics.observe("stt.batch.queue_wait_ms", (batch_start - job.enqueued_at) * 1000)
+
+            try:
+                texts = self.batch_fn(segments)
+                if len(texts) != len(segments):
+                    raise RuntimeError(
+                        f"Batch returned {len(texts)} results for {len(segments)} segments"
+                    )
+            except Exception as e:
+                self.logger.error(f"Batched transcription failed: {e}")
+                for job in jobs:
+                    job.error = e
+                    job.done.set()
+                continue
+
+            inference_seconds = time.perf_counter() - batch_start
+            offset = 0
+            for job in jobs:
+                job.results = texts[offset:offset + len(job.segments)]
+                offset += len(job.segments)
+                job.done.set()
+
+            audio_seconds = sum(segment.size for segment in segments) / WHISPER_SAMPLE_RATE
+            metrics.increment("stt.batch.batches")
+            metrics.increment("stt.batch.segments", len(segments))
+            metrics.observe("stt.batch.requests", len(jobs))
+            metrics.observe("stt.batch.segments_per_batch", len(segments))
+            metrics.observe("stt.batch.inference_ms", inference_seconds * 1000)
+            if inference_seconds > 0:
+                metrics.set_gauge("stt.batch.audio_seconds_per_second", audio_seconds / inference_seconds)
+
+            self.logger.debug(
+                f"Batched {len(segments)} segments from {len(jobs)} requests "
+                f"in {inference_seconds * 1000:.1f}ms"
+            )
@@ -0,0 +1,162 @@
+"""
+Pluggable speech-to-text engines.
+Wraps the inference backends behind a common interface so STTService can run
+either the full WhisperX pipeline or a lean faster-whisper (CTranslate2) model.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ..config.settings import STTSettings
+from ..utils.exceptions import ConfigurationException, ModelLoadException
+from ..utils.logger import get_stt_logger
+
+
+STT_ENGINES = ("whisperx", "faster-whisper")
+
+
+class STTEngine(ABC):
+    """A loaded speech-to-text model of one size."""
+
+    name = ""
+    # Whether transcribe_batch runs segments in one model pass (not one by one)
+    supports_batching = False
+
+    def __init__(self, model_size: str, settings: STTSettings, threads: Optional[int] = None):
+        self.model_size = model_size
+        self.settings = settings
+        # Explicit thread count (worker processes) overrides STT_CPU_THREADS
+        self.threads = threads if threads is not None else settings.cpu_threads
+        self.logger = get_stt_logger()
+
+        self.logger.info(
+            f"Loading {self.name} model '{model_size}' on {settings.device.upper()} "
+            f"with compute type '{settings.compute_type}'"
+        )
+        try:
+            self.model = self._load()
+        except Exception as e:
+            error_msg = f"Failed to load {self.name} model '{model_size}': {str(e)}"
+            self.logger.error(error_msg)
+            raise ModelLoadException(error_msg, self.name, str(e))
+        self.logger.info(f"{self.name} model '{model_size}' loaded successfully")
+
+    @abstractmethod
+    def _load(self) -> Any:
+        """Load and return the underlying model."""
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Transcribe 16 kHz mono float32 audio.
+
+        Returns:
+            Segment dicts with "text" and, when the engine reports it, "avg_logprob"
+        """
+
+    def transcribe_batch(self, segments: List[np.ndarray]) -> List[str]:
+        """Transcribe pre-segmented audio, one transcript per segment (sequentially by default)."""
+        return [
+            " ".join(s["text"].strip() for s in self.transcribe(segment))
+            for segment in segments
+        ]
+
+
+class WhisperXEngine(STTEngine):
+    """Full WhisperX pipeline (VAD, batched faster-whisper inference)."""
+
+    name = "WhisperX"
+
+    @property
+    def supports_batching(self) -> bool:
+        # The pipeline only builds its tokenizer up front for a fixed language;
+        # otherwise it detects the language per transcribe() call
+        return bool(self.settings.language)
+
+    def _load(self) -> Any:
+        import whisperx
+
+        kwargs = {"asr_options": {"beam_size": self.settings.beam_size}}
+        if self.threads > 0:
+            kwargs["threads"] = self.threads
+        return whisperx.load_model(
+            self.model_size,
+            device=self.settings.device,
+            compute_type=self.settings.compute_type,
+            language=self.settings.language,
+            **kwargs
+        )
+
+    def transcribe(self, audio: np.ndarray) -> List[Dict[str, Any]]:
+        result = self.model.transcribe(audio, batch_size=self.settings.batch_size)
+        return result.get("segments", [])
+
+    def transcribe_batch(self, segments: List[np.ndarray]) -> List[str]:
+        if getattr(self.model, "tokenizer", None) is None:
+            # No language to decode with yet: let transcribe() detect it per segment
+            return super().transcribe_batch(segments)
+        # Feed the segments straight into the pipeline, skipping its own VAD pass
+        outputs = self.model(
+            [{"inputs": segment} for segment in segments],
+            batch_size=self.settings.batch_size
+        )
+        return [output["text"] for output in outputs]
+
+
+class FasterWhisperEngine(STTEngine):
+    """
+    Plain faster-whisper/CTranslate2 model, without the WhisperX VAD and alignment stack.
+
+    WhisperModel decodes one audio at a time, so cross-request batching is not
+    supported: transcribe_batch would only serialize the segments.
+    """
+
+    name = "faster-whisper"
+
+    def _load(self) -> Any:
+        from faster_whisper import WhisperModel
+
+        return WhisperModel(
+            self.model_size,
+            device=self.settings.device,
+            compute_type=self.settings.compute_type,
+            cpu_threads=self.threads,
+            num_workers=self.settings.num_workers
+        )
+
+    def transcribe(self, audio: np.ndarray) -> List[Dict[str, Any]]:
+        segments, _ = self.model.transcribe(
+            audio,
+            language=self.settings.language,
+            beam_size=self.settings.beam_size,
+            vad_filter=self.settings.vad_filter
+        )
+        # Segments are generated lazily; decoding happens while iterating
+        return [
+            {"text": segment.text, "avg_logprob": segment.avg_logprob}
+            for segment in segments
+        ]
+
+
+def create_stt_engine(
+    model_size: str,
+    settings: STTSettings,
+    threads: Optional[int] = None
+) -> STTEngine:
+    """
+    Load a model with the engine selected by STT_ENGINE.
+
+    Raises:
+        ConfigurationException: If the engine name is unknown
+        ModelLoadException: If the model fails to load
+    """
+    if settings.engine == "whisperx":
+        return WhisperXEngine(model_size, settings, threads)
+    if settings.engine == "faster-whisper":
+        return FasterWhisperEngine(model_size, settings, threads)
+    raise ConfigurationException(
+        f"Unknown STT engine '{settings.engine}'",
+        f"Expected one of: {', '.join(STT_ENGINES)}"
+    )
@@ -1,131 +1,347 @@
 """
-Speech-to-Text service using WhisperX.
+Speech-to-Text service using WhisperX or faster-whisper.
 Handles audio transcription with robust error handling and configuration management.
 """
 
-import subprocess
-from tempfile import NamedTemporaryFile
-from typing import Optional
+import math
+import threading
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-import whisperx
+import numpy as np
 
 from ..config.settings import get_settings
+from ..utils.cache import LRUCache, content_hash
 from ..utils.logger import get_stt_logger
-from ..utils.exceptions import STTException, ModelLoadException, AudioProcessingException
+from ..utils.exceptions import STTException, AudioProcessingException, ConfigurationException
+from ..utils.metrics import get_metrics
+from ..utils.singleflight import SingleFlight
+from .audio_decoder import WHISPER_SAMPLE_RATE, get_audio_decoder
+from .stt_batching import STTBatchScheduler
+from .stt_engines import STTEngine, create_stt_engine
+from .stt_worker_pool import STTWorkerPool
+from .vad import is_silent, split_segments, trim_silence
+
+
+@dataclass
+class TranscriptionResult:
+    """Transcribed text plus per-request processing stats."""
+    text: str
+    stats: Dict[str, Union[float, str]] = field(default_factory=dict)
 
 
 class STTService:
-    """Speech-to-Text service using WhisperX."""
+    """Speech-to-Text service using a pluggable engine (WhisperX by default)."""
     
     def __init__(self):
         self.settings = get_settings().stt
+        self.audio_settings = get_settings().audio
         self.logger = get_stt_logger()
-        self.model: Optional[whisperx.Model] = None
+        self.model: Optional[STTEngine] = None
+        self.models: Dict[str, STTEngine] = {}
+        self._models_lock = threading.Lock()
+        self.routing_tiers = self._parse_routing_tiers()
+        self.decoder = get_audio_decoder()
+        self.worker_pool: Optional[STTWorkerPool] = None
+        self.batch_scheduler: Optional[STTBatchScheduler] = None
+        # Identical uploads in flight at the same time share one transcription
+        self._inflight = SingleFlight("stt")
+        # Results keyed by upload hash (and optionally decoded PCM hash)
+        self.cache: Optional[LRUCache] = None
+        if self.settings.cache_enabled:
+            self.cache = LRUCache(
+                max_entries=self.settings.cache_max_entries,
+                max_bytes=self.settings.cache_max_bytes,
+                size_of=lambda result: len(result.text.encode("utf-8"))
+            )
+        
+        self._check_routing_mode()
+        
+        # Worker-pool mode: models live in dedicated processes, not in this one
+        if self.settings.worker_pool_size > 0:
+            self.worker_pool = STTWorkerPool(
+                size=self.settings.worker_pool_size,
+                stt_settings=self.settings.model_dump(),
+                intra_threads=self.settings.worker_intra_threads,
+                timeout_seconds=self.settings.worker_timeout_seconds,
+                max_restarts=self.settings.worker_max_restarts,
+                restart_backoff_seconds=self.settings.worker_restart_backoff_seconds
+            )
+            return
+        
         self._load_model()
+        
+        # Optional cross-request micro-batching of VAD segments
+        if self.settings.batching_enabled and not self.model.supports_batching:
+            self.logger.warning(
+                f"STT micro-batching is not supported by the {self.model.name} engine "
+                "with this configuration (faster-whisper, or WhisperX without "
+                "STT_LANGUAGE); transcribing requests individually"
+            )
+        elif self.settings.batching_enabled:
+            self.batch_scheduler = STTBatchScheduler(
+                self.model.transcribe_batch,
+                window_ms=self.settings.batch_window_ms,
+                max_batch_segments=self.settings.batch_max_segments
+            )
+            self.logger.info(
+                f"STT micro-batching enabled ({self.settings.batch_window_ms}ms window, "
+                f"up to {self.settings.batch_max_segments} segments)"
+            )
     
     def _load_model(self) -> None:
-        """Load the WhisperX model with configured settings."""
-        self.logger.info(
-            f"Loading WhisperX model '{self.settings.model_size}' "
-            f"on {self.settings.device.upper()} with compute type '{self.settings.compute_type}'"
+        """Load the main model with the configured engine."""
+        self.model = create_stt_engine(self.settings.model_size, self.settings)
+        self.models[self.settings.model_size] = self.model
+    
+    def _get_model(self, model_size: str) -> STTEngine:
+        """Get a model from the registry, loading it on first use."""
+        model = self.models.get(model_size)
+        if model is not None:
+            return model
+        
+        with self._models_lock:
+            if model_size not in self.models:
+                self.models[model_size] = create_stt_engine(model_size, self.settings)
+            return self.models[model_size]
+    
+    def _parse_routing_tiers(self) -> List[Tuple[float, str]]:
+        """Parse "max_seconds:model_size" routing tiers, shortest first."""
+        tiers = []
+        for tier in self.settings.routing_tiers:
+            max_seconds, _, model_size = tier.partition(":")
+            try:
+                tiers.append((float(max_seconds), model_size.strip()))
+            except ValueError:
+                raise ConfigurationException(
+                    f"Invalid STT routing tier '{tier}'",
+                    "Expected format 'max_seconds:model_size', e.g. '3:base'"
+                )
+        return sorted(tiers)
+    
+    def _check_routing_mode(self) -> None:
+        """Reject duration routing alongside the single-model pool and batching modes."""
+        if not self.settings.routing_enabled:
+            return
+        if self.settings.worker_pool_size > 0:
+            mode = "STT_WORKER_POOL_SIZE > 0"
+        elif self.settings.batching_enabled:
+            mode = "STT_BATCHING_ENABLED"
+        else:
+            return
+        error_msg = f"STT_ROUTING_ENABLED cannot be combined with {mode}"
+        self.logger.error(
+            f"{error_msg}: those modes always transcribe with '{self.settings.model_size}'; "
+            "disable one of them"
+        )
+        raise ConfigurationException(
+            error_msg,
+            "Worker-pool and micro-batching modes run a single model, so duration "
+            "routing and low-confidence escalation would be skipped"
         )
+    
+    def _route_model(self, duration: float) -> str:
+        """Pick the smallest configured model for an utterance of this duration."""
+        if self.settings.routing_enabled:
+            for max_seconds, model_size in self.routing_tiers:
+                if duration <= max_seconds:
+                    return model_size
+        return self.settings.model_size
+    
+    @staticmethod
+    def _estimate_confidence(segments: List[Dict[str, Any]]) -> float:
+        """
+        Quick confidence estimate for a transcription.
         
-        try:
-            self.model = whisperx.load_model(
-                self.settings.model_size,
-                device=self.settings.device,
-                compute_type=self.settings.compute_type,
-                language=self.settings.language
-            )
-            self.logger.info("WhisperX model loaded successfully")
-            
-        except Exception as e:
-            error_msg = f"Failed to load WhisperX model: {str(e)}"
-            self.logger.error(error_msg)
-            raise ModelLoadException(error_msg, "WhisperX", str(e))
+        Uses the mean segment avg_logprob when the engine reports it;
+        otherwise an empty result for audio that passed the silence check
+        counts as zero confidence.
+        """
+        logprobs = [s["avg_logprob"] for s in segments if "avg_logprob" in s]
+        if logprobs:
+            return math.exp(sum(logprobs) / len(logprobs))
+        has_text = any(segment.get("text", "").strip() for segment in segments)
+        return 1.0 if has_text else 0.0
     
-    def _convert_audio_to_wav(self, audio_bytes: bytes) -> str:
-        """Convert audio bytes to WAV format using FFmpeg."""
-        try:
-            with NamedTemporaryFile(suffix=".wav", delete=False) as temp_wav_file:
-                wav_filename = temp_wav_file.name
-                
-                ffmpeg_command = [
-                    "ffmpeg", "-i", "pipe:0", 
-                    "-ac", str(self.settings.batch_size), 
-                    "-ar", "16000", 
-                    "-f", "wav", 
-                    "-y", wav_filename
-                ]
-                
-                process = subprocess.Popen(
-                    ffmpeg_command,
-                    stdin=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE
+    def _transcribe_routed(self, audio: np.ndarray, stats: Dict[str, Union[float, str]]) -> str:
+        """Transcribe with the duration-routed model, escalating on low confidence."""
+        model_size = self._route_model(audio.size / WHISPER_SAMPLE_RATE)
+        self.logger.debug(f"Transcribing with {self.settings.engine} model '{model_size}'")
+        segments = self._get_model(model_size).transcribe(audio)
+        stats["stt_model"] = model_size
+        stats["stt_escalated"] = 0
+        
+        min_confidence = self.settings.routing_min_confidence
+        if model_size != self.settings.model_size and min_confidence > 0:
+            confidence = self._estimate_confidence(segments)
+            stats["stt_confidence"] = round(confidence, 3)
+            if confidence < min_confidence:
+                self.logger.info(
+                    f"Low confidence ({confidence:.2f}) from '{model_size}', "
+                    f"escalating to '{self.settings.model_size}'"
                 )
-                
-                stdout, stderr = process.communicate(input=audio_bytes)
-                
-                if process.returncode != 0:
-                    error_msg = f"FFmpeg conversion failed: {stderr.decode()}"
-                    self.logger.error(error_msg)
-                    raise AudioProcessingException("Audio conversion failed", error_msg)
-                
-                return wav_filename
-                
-        except Exception as e:
-            if isinstance(e, AudioProcessingException):
-                raise
-            raise AudioProcessingException("Failed to convert audio to WAV", str(e))
+                get_metrics().increment("stt.routing.escalations")
+                segments = self.model.transcribe(audio)
+                stats["stt_model"] = self.settings.model_size
+                stats["stt_escalated"] = 1
+        
+        get_metrics().increment(f"stt.routing.{stats['stt_model']}")
+        return " ".join(segment["text"].strip() for segment in segments)
     
-    def transcribe_audio(self, audio_bytes: bytes) -> str:
+    def _is_silent(self, audio: np.ndarray) -> bool:
+        """Check the decoded audio against the configured silence thresholds."""
+        if not self.audio_settings.silence_detection_enabled:
+            return False
+        return is_silent(
+            audio,
+            rms_threshold=self.audio_settings.silence_rms_threshold,
+            min_duration=self.audio_settings.min_duration_seconds,
+            min_speech=self.audio_settings.min_speech_seconds,
+            frame_ms=self.audio_settings.silence_frame_ms
+        )
+    
+    def _trim_silence(self, audio: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Trim edge silence and long pauses; returns (audio, seconds removed)."""
+        if not self.audio_settings.vad_trim_enabled:
+            return audio, 0.0
+        return trim_silence(
+            audio,
+            rms_threshold=self.audio_settings.silence_rms_threshold,
+            padding_ms=self.audio_settings.vad_padding_ms,
+            max_pause_ms=self.audio_settings.vad_max_pause_ms,
+            frame_ms=self.audio_settings.silence_frame_ms
+        )
+    
+    def _cache_lookup(self, key: str, metric: str) -> Optional[TranscriptionResult]:
+        """Return a copy of a cached result flagged as a cache hit, if present."""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        get_metrics().increment(metric)
+        self.logger.debug("STT cache hit")
+        return replace(cached, stats=dict(cached.stats, stt_cache_hit=1))
+    
+    def _cache_store(self, keys: List[str], result: TranscriptionResult) -> None:
+        """Store a result under each of its cache keys."""
+        if self.cache is None or not keys:
+            return
+        for key in keys:
+            self.cache.put(key, result)
+        metrics = get_metrics()
+        metrics.set_gauge("stt.cache.entries", len(self.cache))
+        metrics.set_gauge("stt.cache.bytes", self.cache.total_bytes)
+    
+    def transcribe(
+        self,
+        audio_bytes: bytes,
+        content_type: Optional[str] = None,
+        use_cache: bool = True
+    ) -> TranscriptionResult:
         """
-        Transcribe audio bytes to text using WhisperX.
+        Transcribe audio bytes and report per-request processing stats.
         
         Args:
             audio_bytes: Raw audio data in bytes
+            content_type: Declared upload format (audio/L16 and audio/wav skip FFmpeg)
+            use_cache: Look up and store the result in the transcript cache
+                (off for throwaway audio such as partial-transcript snapshots)
             
         Returns:
-            Transcribed text string
+            TranscriptionResult with the text and stats such as
+            stt_audio_seconds and stt_vad_removed_seconds (stt_cache_hit
+            is set when the result came from the cache, stt_coalesced when
+            it was shared with an identical concurrent request)
             
         Raises:
             STTException: If transcription fails
         """
-        if not self.model:
-            raise STTException("WhisperX model is not available")
+        if not self.model and not self.worker_pool:
+            raise STTException("STT model is not available")
+        
+        if not use_cache:
+            return self._transcribe_uncached(audio_bytes, content_type, None)
         
+        # Retried uploads are byte-identical: answer them without decoding
+        upload_key = content_hash((content_type or "").encode("utf-8"), b"\0", audio_bytes)
+        cached = self._cache_lookup(upload_key, "stt.cache.hits")
+        if cached is not None:
+            return cached
+        
+        result, shared = self._inflight.do(
+            upload_key,
+            lambda: self._transcribe_uncached(audio_bytes, content_type, upload_key)
+        )
+        if shared:
+            return replace(result, stats=dict(result.stats, stt_coalesced=1))
+        return result
+    
+    def _transcribe_uncached(
+        self,
+        audio_bytes: bytes,
+        content_type: Optional[str],
+        upload_key: Optional[str]
+    ) -> TranscriptionResult:
+        """Decode and transcribe an upload that missed the upload-hash cache (None: uncached)."""
+        cache_keys = [upload_key] if upload_key is not None else []
         try:
             self.logger.debug("Starting audio transcription")
             
-            # Convert audio to WAV format
-            wav_filename = self._convert_audio_to_wav(audio_bytes)
+            # Decode audio straight into a NumPy buffer
+            audio = self.decoder.decode(audio_bytes, content_type)
+            stats = {"stt_audio_seconds": round(audio.size / WHISPER_SAMPLE_RATE, 3)}
+            
+            # Same samples in a different container (e.g. re-encoded upload)
+            if cache_keys and self.cache is not None and self.settings.cache_hash_pcm:
+                cache_keys.append("pcm:" + content_hash(audio.tobytes()))
+                cached = self._cache_lookup(cache_keys[1], "stt.cache.pcm_hits")
+                if cached is not None:
+                    self._cache_store(cache_keys[:1], cached)
+                    return cached
+            
+            if cache_keys and self.cache is not None:
+                get_metrics().increment("stt.cache.misses")
+            
+            # Skip the model entirely for accidental taps and near-silent clips
+            if self._is_silent(audio):
+                self.logger.info("Audio is silent or too short, skipping transcription")
+                get_metrics().increment("stt.silence_skipped")
+                result = TranscriptionResult("", stats)
+                self._cache_store(cache_keys, result)
+                return result
+            
+            # Whisper compute scales with length: drop silence the model would only pad
+            audio, removed_seconds = self._trim_silence(audio)
+            stats["stt_vad_removed_seconds"] = round(removed_seconds, 3)
+            get_metrics().observe("stt.vad_removed_seconds", removed_seconds)
+            if removed_seconds > 0:
+                self.logger.debug(f"VAD removed {removed_seconds:.2f}s of silence")
+            
+            if self.worker_pool is not None:
+                # Decoded samples go to a worker process through shared memory
+                transcribed_text = self.worker_pool.transcribe(audio)
+                stats["stt_model"] = self.settings.model_size
+            elif self.batch_scheduler is not None:
+                # Segments from concurrent requests share one batched model pass
+                segments = split_segments(
+                    audio,
+                    rms_threshold=self.audio_settings.silence_rms_threshold,
+                    padding_ms=self.audio_settings.vad_padding_ms,
+                    frame_ms=self.audio_settings.silence_frame_ms
+                )
+                texts = self.batch_scheduler.submit(segments)
+                transcribed_text = " ".join(text.strip() for text in texts if text.strip())
+                stats["stt_model"] = self.settings.model_size
+            else:
+                # Transcribe with the model routed by utterance duration
+                transcribed_text = self._transcribe_routed(audio, stats)
+            
+            self.logger.info(f"Transcription completed: '{transcribed_text}'")
+            result = TranscriptionResult(transcribed_text, stats)
+            self._cache_store(cache_keys, result)
+            return result
             
-            try:
-                # Load audio with WhisperX utility
-                audio = whisperx.load_audio(wav_filename)
-                
-                # Transcribe with the loaded model
-                self.logger.debug("Transcribing with WhisperX")
-                result = self.model.transcribe(audio, batch_size=self.settings.batch_size)
-                
-                # Join segments to get complete transcription
-                transcribed_text = " ".join([
-                    segment['text'].strip() 
-                    for segment in result.get("segments", [])
-                ])
-                
-                self.logger.info(f"Transcription completed: '{transcribed_text}'")
-                return transcribed_text
-                
-            finally:
-                # Clean up temporary file
-                import os
-                try:
-                    os.unlink(wav_filename)
-                except OSError:
-                    pass
-                    
         except Exception as e:
             if isinstance(e, (STTException, AudioProcessingException)):
                 raise
@@ -134,14 +350,46 @@ class STTService:
             self.logger.error(error_msg)
             raise STTException(error_msg, str(e))
     
+    def transcribe_audio(
+        self,
+        audio_bytes: bytes,
+        content_type: Optional[str] = None,
+        use_cache: bool = True
+    ) -> str:
+        """
+        Transcribe audio bytes to text.
+        
+        Args:
+            audio_bytes: Raw audio data in bytes
+            content_type: Declared upload format (audio/L16 and audio/wav skip FFmpeg)
+            use_cache: Look up and store the result in the transcript cache
+            
+        Returns:
+            Transcribed text string
+            
+        Raises:
+            STTException: If transcription fails
+        """
+        return self.transcribe(audio_bytes, content_type, use_cache).text
+    
     def is_available(self) -> bool:
         """Check if the STT service is available."""
+        if self.worker_pool is not None:
+            return self.worker_pool.is_available()
         return self.model is not None
     
+    def shutdown(self) -> None:
+        """Stop the STT worker processes, if any."""
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown()
+    
     def reload_model(self) -> None:
-        """Reload the WhisperX model (useful for configuration changes)."""
-        self.logger.info("Reloading WhisperX model")
+        """Reload the STT model (useful for configuration changes)."""
+        self.logger.info("Reloading STT model")
         self.model = None
+        self.models = {}
+        if self.cache is not None:
+            self.cache.clear()
         self._load_model()
 
 
@@ -157,10 +405,10 @@ def get_stt_service() -> STTService:
     return _stt_service
 
 
-def transcribe_audio(audio_bytes: bytes) -> str:
+def transcribe_audio(audio_bytes: bytes, content_type: Optional[str] = None) -> str:
     """
     Convenience function for audio transcription.
     Maintains backward compatibility with existing code.
     """
     service = get_stt_service()
-    return service.transcribe_audio(audio_bytes)
\ No newline at end of file
+    return service.transcribe_audio(audio_bytes, content_type)
\ No newline at end of file
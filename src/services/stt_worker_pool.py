@@ -0,0 +1,329 @@
+"""
+Multi-process STT worker pool.
+Runs N STT worker processes, each with its own model. The parent assigns
+each job to one idle worker over that worker's own pipe, so a crash always
+fails exactly the job the worker held. Audio is handed over through
+multiprocessing.shared_memory so samples are never pickled, and crashed
+workers are restarted with exponential backoff (a worker that keeps crashing
+before it is ready is eventually given up on).
+"""
+
+import itertools
+import multiprocessing as mp
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection, wait
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..utils.logger import get_stt_logger
+from ..utils.exceptions import STTException
+from ..utils.metrics import get_metrics
+
+
+def _worker_main(
+    worker_index: int,
+    stt_settings: Dict[str, Any],
+    intra_threads: int,
+    task_conn: Connection,
+    result_conn: Connection
+) -> None:
+    """Worker process entry point: load an engine and serve the tasks assigned to it."""
+    from ..config.settings import STTSettings
+    from .stt_engines import create_stt_engine
+
+    settings = STTSettings(**stt_settings)
+    engine = create_stt_engine(settings.model_size, settings, threads=intra_threads)
+    result_conn.send(("ready", worker_index, None, None))
+
+    while True:
+        try:
+            task = task_conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+
+        job_id, shm_name, length = task
+        try:
+            # Spawned workers share the parent's resource tracker; the parent unlinks
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                audio = np.ndarray((length,), dtype=np.float32, buffer=shm.buf)
+                text = " ".join(segment["text"].strip() for segment in engine.transcribe(audio))
+                del audio
+            finally:
+                shm.close()
+            result_conn.send(("done", worker_index, job_id, text))
+
+        except Exception as e:
+            result_conn.send(("error", worker_index, job_id, str(e)))
+
+
+class STTWorkerPool:
+    """Pool of STT worker processes with shared-memory audio transfer."""
+
+    def __init__(
+        self,
+        size: int,
+        stt_settings: Dict[str, Any],
+        intra_threads: int,
+        timeout_seconds: float,
+        max_restarts: int = 5,
+        restart_backoff_seconds: float = 1.0,
+        restart_backoff_max_seconds: float = 60.0
+    ):
+        self.size = size
+        self.stt_settings = stt_settings
+        self.intra_threads = intra_threads
+        self.timeout_seconds = timeout_seconds
+        self.max_restarts = max_restarts
+        self.restart_backoff_seconds = restart_backoff_seconds
+        self.restart_backoff_max_seconds = restart_backoff_max_seconds
+        self.logger = get_stt_logger()
+
+        self._context = mp.get_context("spawn")
+        self._workers: List[Optional[mp.Process]] = [None] * size
+        # Parent ends of each worker's task pipe (sends happen under _lock)
+        self._task_conns: List[Optional[Connection]] = [None] * size
+        self._connections: Dict[Connection, int] = {}
+        self._pending: Dict[int, Future] = {}
+        # Jobs waiting for an idle worker: (job_id, shm_name, length)
+        self._queue: Deque[Tuple[int, str, int]] = deque()
+        # Worker slot -> job it is running
+        self._assigned: Dict[int, int] = {}
+        self._ready: Set[int] = set()
+        self._idle: Set[int] = set()
+        # Crashes of each slot since its worker was last ready
+        self._failures: List[int] = [0] * size
+        # Slot -> monotonic time of its scheduled restart
+        self._restart_at: Dict[int, float] = {}
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        for worker_index in range(size):
+            self._start_worker(worker_index)
+
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="jarv1s-stt-pool", daemon=True
+        )
+        self._dispatcher.start()
+        self.logger.info(
+            f"STT worker pool started with {size} processes "
+            f"({intra_threads} intra-op threads each)"
+        )
+
+    def _start_worker(self, worker_index: int) -> None:
+        """Spawn (or respawn) the worker process for a slot."""
+        receiver, sender = self._context.Pipe(duplex=False)
+        task_receiver, task_sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker_index, self.stt_settings, self.intra_threads, task_receiver, sender),
+            name=f"jarv1s-stt-worker-{worker_index}",
+            daemon=True
+        )
+        process.start()
+        # Keep only the child's end of the write side open so EOF signals a crash
+        sender.close()
+        task_receiver.close()
+        self._workers[worker_index] = process
+        self._task_conns[worker_index] = task_sender
+        self._connections[receiver] = worker_index
+
+    def _assign(self) -> None:
+        """Hand queued jobs to idle workers (caller holds the lock)."""
+        while self._queue and self._idle:
+            worker_index = self._idle.pop()
+            job = self._queue.popleft()
+            try:
+                self._task_conns[worker_index].send(job)
+            except (OSError, ValueError):
+                # The worker is dying; it will be reaped and the job goes to another one
+                self._queue.appendleft(job)
+                continue
+            self._assigned[worker_index] = job[0]
+
+    def is_available(self) -> bool:
+        """Check whether at least one worker has loaded its model."""
+        return not self._closed and bool(self._ready)
+
+    def _crash_looping(self) -> bool:
+        """No worker is ready and every slot has crashed since it last was."""
+        return not self._ready and all(self._failures)
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        """
+        Transcribe 16 kHz mono float32 audio on a worker process.
+
+        Raises:
+            STTException: If the worker fails, crashes or times out
+        """
+        if self._closed:
+            raise STTException("STT worker pool is shut down")
+        if self._crash_looping():
+            # Fail fast instead of waiting out the timeout on a pool that cannot serve
+            raise STTException("No STT worker is available (workers keep crashing)")
+
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+        job_id = next(self._job_ids)
+        future: Future = Future()
+
+        try:
+            np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+            with self._lock:
+                self._pending[job_id] = future
+                self._queue.append((job_id, shm.name, audio.size))
+                self._assign()
+
+            try:
+                return future.result(timeout=self.timeout_seconds)
+            except FutureTimeoutError:
+                raise STTException(
+                    f"STT worker did not respond within {self.timeout_seconds}s"
+                )
+        finally:
+            with self._lock:
+                self._pending.pop(job_id, None)
+                # A job that timed out before reaching a worker is never started
+                self._queue = deque(job for job in self._queue if job[0] != job_id)
+            shm.close()
+            shm.unlink()
+
+    def _resolve(self, job_id: int, text: Optional[str], error: Optional[str]) -> None:
+        """Complete the future waiting on a job."""
+        with self._lock:
+            future = self._pending.get(job_id)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(STTException("STT worker failed", error))
+        else:
+            future.set_result(text)
+
+    def _check_workers(self) -> None:
+        """Reap dead workers, restart them with backoff and fail requests nobody can serve."""
+        now = time.monotonic()
+        for worker_index, process in enumerate(self._workers):
+            if self._closed:
+                # Workers stopped by shutdown() are neither restarted nor reported
+                return
+            if process is not None and not process.is_alive():
+                self._reap_worker(worker_index, process, now)
+            elif process is None and self._restart_at.get(worker_index, float("inf")) <= now:
+                del self._restart_at[worker_index]
+                get_metrics().increment("stt.pool.restarts")
+                self._start_worker(worker_index)
+
+        if self._crash_looping():
+            with self._lock:
+                futures = [future for future in self._pending.values() if not future.done()]
+            for future in futures:
+                future.set_exception(STTException("No STT worker is available"))
+
+    def _reap_worker(self, worker_index: int, process: mp.Process, now: float) -> None:
+        """Clean up a dead worker's slot and schedule its restart (or give up on it)."""
+        if self._closed:
+            return
+        self._workers[worker_index] = None
+        self._ready.discard(worker_index)
+        self._failures[worker_index] += 1
+        failures = self._failures[worker_index]
+
+        with self._lock:
+            self._idle.discard(worker_index)
+            job_id = self._assigned.pop(worker_index, None)
+            task_conn, self._task_conns[worker_index] = self._task_conns[worker_index], None
+        if task_conn is not None:
+            task_conn.close()
+        # Whatever the worker held fails now, even if it crashed before starting on it
+        if job_id is not None:
+            self._resolve(job_id, None, f"worker {worker_index} crashed")
+
+        for connection, index in list(self._connections.items()):
+            if index == worker_index:
+                del self._connections[connection]
+                connection.close()
+
+        if failures > self.max_restarts:
+            self.logger.error(
+                f"STT worker {worker_index} exited with code {process.exitcode} "
+                f"{failures} times in a row without becoming ready; not restarting it"
+            )
+            get_metrics().increment("stt.pool.abandoned")
+            if all(worker is None for worker in self._workers) and not self._restart_at:
+                self.logger.error("STT worker pool unavailable: every worker keeps crashing")
+            return
+
+        delay = min(
+            self.restart_backoff_seconds * 2 ** (failures - 1), self.restart_backoff_max_seconds
+        )
+        self.logger.error(
+            f"STT worker {worker_index} exited with code {process.exitcode}, "
+            f"restarting in {delay:.1f}s"
+        )
+        self._restart_at[worker_index] = now + delay
+
+    def _dispatch(self) -> None:
+        """Route worker messages to waiting requests and supervise workers."""
+        while not self._closed:
+            for connection in wait(list(self._connections), timeout=1.0):
+                try:
+                    kind, worker_index, job_id, payload = connection.recv()
+                except (EOFError, OSError):
+                    # Worker died; wait for the process to be reaped, then restart it
+                    process = self._workers[self._connections[connection]]
+                    if process is not None:
+                        process.join(timeout=1.0)
+                    continue
+
+                if kind == "ready":
+                    self._ready.add(worker_index)
+                    self._failures[worker_index] = 0
+                    self.logger.info(f"STT worker {worker_index} ready")
+                elif kind in ("done", "error"):
+                    get_metrics().increment(f"stt.pool.{kind}")
+                    if kind == "done":
+                        self._resolve(job_id, payload, None)
+                    else:
+                        self._resolve(job_id, None, payload)
+                    with self._lock:
+                        self._assigned.pop(worker_index, None)
+
+                if kind in ("ready", "done", "error"):
+                    with self._lock:
+                        self._idle.add(worker_index)
+                        self._assign()
+
+            self._check_workers()
+
+    def shutdown(self) -> None:
+        """Stop all worker processes."""
+        if self._closed:
+            return
+        self._closed = True
+
+        with self._lock:
+            for task_conn in self._task_conns:
+                if task_conn is not None:
+                    try:
+                        task_conn.send(None)
+                    except (OSError, ValueError):
+                        pass
+        for process in self._workers:
+            if process is not None:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+        with self._lock:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(STTException("STT worker pool shut down"))
+        self.logger.info("STT worker pool stopped")
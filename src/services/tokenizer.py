@@ -0,0 +1,89 @@
+"""
+Token counting for conversation history budgets.
+A tokenizer only needs count(text); the model's own tokenizer is used through
+litellm when it can be resolved, otherwise a fast character heuristic.
+"""
+
+import math
+from abc import ABC, abstractmethod
+
+from ..utils.exceptions import ConfigurationException
+from ..utils.logger import get_llm_logger
+
+
+TOKENIZERS = ("auto", "litellm", "heuristic")
+
+# Chat-format tokens added around each message (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class Tokenizer(ABC):
+    """Counts the tokens a text costs in the model's context window."""
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """Number of tokens in text."""
+
+
+class HeuristicTokenizer(Tokenizer):
+    """Character-based estimate; errs high so a budget is not overrun."""
+
+    def __init__(self, chars_per_token: float = 3.5):
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+
+class LiteLLMTokenizer(Tokenizer):
+    """Model tokenizer resolved by litellm.token_counter."""
+
+    def __init__(self, model: str):
+        import litellm
+
+        # token_counter never fails: for a model it does not know it silently
+        # counts with a generic OpenAI encoding, so unknown models are rejected here
+        if not is_known_model(model):
+            raise ValueError(f"litellm has no tokenizer information for '{model}'")
+        self.model = model
+        self._counter = litellm.token_counter
+
+    def count(self, text: str) -> int:
+        return self._counter(model=self.model, text=text)
+
+
+def is_known_model(model: str) -> bool:
+    """Whether litellm's model map lists the model, with or without its provider prefix."""
+    import litellm
+
+    model_cost = getattr(litellm, "model_cost", None) or {}
+    return model in model_cost or model.split("/", 1)[-1] in model_cost
+
+
+def create_tokenizer(name: str, model: str) -> Tokenizer:
+    """
+    Create the tokenizer selected by LLM_TOKENIZER.
+
+    "auto" uses the model tokenizer when litellm knows the model and the
+    heuristic otherwise (local servers such as LM Studio or llama.cpp).
+
+    Raises:
+        ConfigurationException: If the name is unknown, or "litellm" cannot be used
+    """
+    if name not in TOKENIZERS:
+        raise ConfigurationException(
+            f"Unknown tokenizer '{name}'",
+            f"Expected one of: {', '.join(TOKENIZERS)}"
+        )
+    if name == "heuristic":
+        return HeuristicTokenizer()
+
+    try:
+        return LiteLLMTokenizer(model)
+    except Exception as e:
+        if name == "litellm":
+            raise ConfigurationException(f"No tokenizer available for model '{model}'", str(e))
+        get_llm_logger().info(
+            f"No tokenizer available for model '{model}', using the heuristic estimate"
+        )
+        return HeuristicTokenizer()
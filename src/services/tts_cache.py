@@ -0,0 +1,160 @@
+"""
+Persistent cache for synthesized speech.
+Two tiers of raw PCM16 audio keyed by normalized text, voice and synthesis
+parameters: an in-memory LRU for hot phrases and a size-bounded directory on
+disk that survives restarts.
+"""
+
+import os
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ..utils.cache import LRUCache, content_hash
+from ..utils.logger import get_tts_logger
+from ..utils.metrics import get_metrics
+
+
+# Bump when the stored audio format changes to orphan old entries
+_CACHE_VERSION = "1"
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache lookups (Unicode NFC, collapsed whitespace)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def make_audio_key(text: str, voice: str, sample_rate: int, params: Dict[str, Any]) -> str:
+    """
+    Build the key identifying a synthesis request's audio.
+
+    voice must identify the model itself (name plus file fingerprint), so
+    replacing a model under the same name never serves its old audio.
+    """
+    parts = [_CACHE_VERSION, normalize_text(text), voice, str(sample_rate)]
+    parts.extend(f"{name}={params[name]}" for name in sorted(params))
+    return content_hash("\0".join(parts).encode("utf-8"))
+
+
+class TTSAudioCache:
+    """Memory + disk LRU cache of synthesized PCM16 audio."""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        memory_max_entries: int,
+        memory_max_bytes: int,
+        disk_max_bytes: int
+    ):
+        self.cache_dir = cache_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.logger = get_tts_logger()
+        self.memory = LRUCache(memory_max_entries, memory_max_bytes)
+        self._lock = threading.Lock()
+        # Disk index in LRU order: key -> file size
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+
+        if disk_max_bytes > 0:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._scan_disk()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pcm")
+
+    def _scan_disk(self) -> None:
+        """Rebuild the disk index from the cache directory, oldest first."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".pcm"):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+        self._evict_disk()
+        self.logger.info(
+            f"TTS disk cache: {len(self._disk)} entries, {self._disk_bytes} bytes in {self.cache_dir}"
+        )
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used files until the disk tier fits its budget."""
+        while self._disk and self._disk_bytes > self.disk_max_bytes:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Look up cached PCM audio, promoting disk hits into memory."""
+        metrics = get_metrics()
+        audio = self.memory.get(key)
+        if audio is not None:
+            metrics.increment("tts.cache.memory_hits")
+            return audio
+
+        with self._lock:
+            on_disk = key in self._disk
+            if on_disk:
+                self._disk.move_to_end(key)
+
+        if on_disk:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    audio = f.read()
+                # Persist recency so LRU order survives restarts
+                os.utime(path)
+            except OSError as e:
+                self.logger.warning(f"Dropping unreadable TTS cache entry {key}: {e}")
+                with self._lock:
+                    self._disk_bytes -= self._disk.pop(key, 0)
+                audio = None
+
+            if audio is not None:
+                metrics.increment("tts.cache.disk_hits")
+                self.memory.put(key, audio)
+                return audio
+
+        metrics.increment("tts.cache.misses")
+        return None
+
+    def put(self, key: str, audio: bytes) -> None:
+        """Store PCM audio in both tiers."""
+        self.memory.put(key, audio)
+        if self.disk_max_bytes <= 0 or len(audio) > self.disk_max_bytes:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write atomically so a crash never leaves a truncated entry behind
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Failed to write TTS cache entry: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes += len(audio) - self._disk.pop(key, 0)
+            self._disk[key] = len(audio)
+            self._evict_disk()
+            disk_entries, disk_bytes = len(self._disk), self._disk_bytes
+
+        metrics = get_metrics()
+        metrics.set_gauge("tts.cache.memory_bytes", self.memory.total_bytes)
+        metrics.set_gauge("tts.cache.disk_entries", disk_entries)
+        metrics.set_gauge("tts.cache.disk_bytes", disk_bytes)
+
+    def clear(self) -> None:
+        """Empty the memory tier (disk entries are keyed by model identity and stay valid)."""
+        self.memory.clear()
@@ -0,0 +1,97 @@
+"""
+Pool of Piper ONNX sessions for parallel synthesis.
+Each session has its own onnxruntime thread settings; independent sentences of
+one reply (and concurrent requests) are synthesized on separate sessions and
+stitched back in order.
+"""
+
+import json
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import onnxruntime
+from piper.config import PiperConfig
+from piper.voice import PiperVoice
+
+from ..utils.logger import get_tts_logger
+from ..utils.metrics import get_metrics
+
+
+def load_piper_config(config_path: str) -> PiperConfig:
+    """Read a voice's .onnx.json config without creating an inference session."""
+    with open(config_path, "r", encoding="utf-8") as config_file:
+        return PiperConfig.from_dict(json.load(config_file))
+
+
+class PiperSessionPool:
+    """Fixed set of PiperVoice instances sharing one config, one session each."""
+
+    def __init__(
+        self,
+        config: PiperConfig,
+        model_path: str,
+        size: int,
+        intra_op_threads: int,
+        inter_op_threads: int
+    ):
+        self.size = size
+        self.logger = get_tts_logger()
+        self.voices: List[PiperVoice] = []
+        self._idle: "queue.Queue[PiperVoice]" = queue.Queue()
+
+        for _ in range(size):
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = intra_op_threads
+            options.inter_op_num_threads = inter_op_threads
+            session = onnxruntime.InferenceSession(
+                model_path,
+                sess_options=options,
+                providers=["CPUExecutionProvider"]
+            )
+            voice = PiperVoice(config=config, session=session)
+            self.voices.append(voice)
+            self._idle.put(voice)
+
+        # One thread per session: segments beyond that wait for a free session
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="jarv1s-piper")
+        self.logger.info(
+            f"Piper session pool ready: {size} sessions "
+            f"({intra_op_threads} intra-op / {inter_op_threads} inter-op threads each)"
+        )
+
+    @contextmanager
+    def session(self) -> Iterator[PiperVoice]:
+        """Borrow an idle voice session, blocking until one is free."""
+        voice = self._idle.get()
+        try:
+            yield voice
+        finally:
+            self._idle.put(voice)
+
+    def _render(self, text: str) -> bytes:
+        """Synthesize one segment to PCM on a borrowed session."""
+        with self.session() as voice:
+            return b"".join(voice.synthesize_stream_raw(text))
+
+    def synthesize_segments(self, segments: List[str]) -> Iterator[bytes]:
+        """
+        Synthesize segments in parallel and yield their audio in order.
+
+        Each segment's PCM is yielded as soon as it and every segment before
+        it are done, so playback can start before the whole reply is rendered.
+        """
+        get_metrics().observe("tts.pool.segments_per_request", len(segments))
+        futures = [self._executor.submit(self._render, segment) for segment in segments]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            # Abandoned stream: skip segments that have not started yet
+            for future in futures:
+                future.cancel()
+
+    def shutdown(self, cancel_pending: bool = True) -> None:
+        """Stop the segment executor, dropping queued segments unless told otherwise."""
+        self._executor.shutdown(wait=False, cancel_futures=cancel_pending)
@@ -3,15 +3,57 @@ Text-to-Speech service using Piper TTS.
 Handles voice synthesis with robust error handling and configuration management.
 """
 
-import io
-import wave
-from typing import Tuple, Optional
+import os
+import re
+import struct
+from typing import Any, Dict, Iterator, List, Tuple, Optional
 
 from piper.voice import PiperVoice
 
 from ..config.settings import get_settings
 from ..utils.logger import get_tts_logger
 from ..utils.exceptions import TTSException, ModelLoadException
+from ..utils.singleflight import SingleFlight
+from .tts_cache import TTSAudioCache, make_audio_key
+from .tts_pool import PiperSessionPool, load_piper_config
+from .tts_voices import LoadedVoice, VoiceRegistry
+
+
+def build_wav_header(sample_rate: int, data_size: Optional[int] = None) -> bytes:
+    """
+    Build a 44-byte PCM16 mono WAV header.
+    
+    When data_size is unknown (streamed audio) the RIFF and data chunk sizes
+    are set to 0xFFFFFFFF, which players treat as "read until end of stream".
+    """
+    if data_size is None:
+        riff_size = data_chunk_size = 0xFFFFFFFF
+    else:
+        riff_size = 36 + data_size
+        data_chunk_size = data_size
+    
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+        b"data", data_chunk_size
+    )
+
+
+def _file_fingerprint(*paths: str) -> str:
+    """Cheap identity of files (size and mtime), changed by any replacement."""
+    parts = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{stat.st_size}-{stat.st_mtime_ns}")
+        except OSError:
+            parts.append("missing")
+    return ":".join(parts)
+
+
+# Voice names map to <voices_dir>/<name>.onnx; no path separators allowed
+_VOICE_NAME = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
 
 
 class TTSService:
@@ -21,73 +63,217 @@ class TTSService:
         self.settings = get_settings().tts
         self.logger = get_tts_logger()
         self.model: Optional[PiperVoice] = None
+        self.default_voice = os.path.basename(self.settings.model_path).removesuffix(".onnx")
+        self.voices = VoiceRegistry(
+            self._load_voice,
+            memory_budget_bytes=self.settings.voice_memory_budget_mb * 1024 * 1024,
+            pinned_voice=self.default_voice
+        )
+        self.cache: Optional[TTSAudioCache] = None
+        # Identical texts synthesized concurrently share one Piper run
+        self._inflight = SingleFlight("tts")
+        if self.settings.cache_enabled:
+            self.cache = TTSAudioCache(
+                cache_dir=self.settings.cache_dir,
+                memory_max_entries=self.settings.cache_memory_max_entries,
+                memory_max_bytes=self.settings.cache_memory_max_bytes,
+                disk_max_bytes=self.settings.cache_disk_max_bytes
+            )
         self._load_model()
     
     def _load_model(self) -> None:
-        """Load the Piper TTS model with configured settings."""
-        self.logger.info(f"Loading Piper TTS model from {self.settings.model_path}")
+        """Load the default Piper voice with configured settings."""
+        self.model = self.voices.get(self.default_voice).model
+    
+    def _voice_paths(self, name: str) -> Tuple[str, str]:
+        """Resolve a voice name to its model and config paths."""
+        if name == self.default_voice:
+            return self.settings.model_path, self.settings.config_path
         
+        model_path = os.path.join(self.settings.voices_dir, f"{name}.onnx")
+        if not _VOICE_NAME.match(name) or not os.path.isfile(model_path):
+            raise TTSException(f"Unknown voice '{name}'")
+        return model_path, f"{model_path}.json"
+    
+    def has_voice(self, name: str) -> bool:
+        """Check whether a voice name resolves to an installed model."""
         try:
-            self.model = PiperVoice.load(
-                self.settings.model_path,
-                config_path=self.settings.config_path
+            self._voice_paths(name)
+            return True
+        except TTSException:
+            return False
+    
+    def _load_voice(self, name: str) -> LoadedVoice:
+        """Load a Piper voice (and its session pool, if enabled)."""
+        model_path, config_path = self._voice_paths(name)
+        self.logger.info(f"Loading Piper TTS model from {model_path}")
+        
+        try:
+            session_pool = None
+            
+            # Session-pool mode: only tuned onnxruntime sessions are created
+            if self.settings.session_pool_size > 0:
+                session_pool = PiperSessionPool(
+                    load_piper_config(config_path),
+                    model_path,
+                    size=self.settings.session_pool_size,
+                    intra_op_threads=self.settings.intra_op_threads,
+                    inter_op_threads=self.settings.inter_op_threads
+                )
+                model = session_pool.voices[0]
+            else:
+                model = PiperVoice.load(model_path, config_path=config_path)
+            
+            # Resident size is dominated by the ONNX weights, once per session
+            size_bytes = os.path.getsize(model_path) * max(1, self.settings.session_pool_size)
+            self.logger.info(f"Piper TTS voice '{name}' loaded successfully")
+            return LoadedVoice(
+                name, model, session_pool, size_bytes,
+                fingerprint=_file_fingerprint(model_path, config_path)
             )
-            self.logger.info("Piper TTS model loaded successfully")
             
         except Exception as e:
             error_msg = f"Failed to load Piper TTS model: {str(e)}"
             self.logger.error(error_msg)
             raise ModelLoadException(error_msg, "Piper TTS", str(e))
     
-    def _generate_raw_audio(self, text: str) -> bytes:
-        """Generate raw PCM audio data from text."""
+    def _get_voice(self, voice: Optional[str]) -> LoadedVoice:
+        """Get a loaded voice by name (default voice when None)."""
         if not self.model:
             raise TTSException("Piper TTS model is not available")
+        return self.voices.get(voice or self.default_voice)
+    
+    @staticmethod
+    def _synthesis_params(model: PiperVoice) -> Dict[str, Any]:
+        """Synthesis parameters that change the rendered audio."""
+        return {
+            name: getattr(model.config, name)
+            for name in ("length_scale", "noise_scale", "noise_w")
+            if hasattr(model.config, name)
+        }
+    
+    def _audio_key(self, text: str, voice: LoadedVoice) -> str:
+        """Key identifying text rendered with a voice and its parameters."""
+        return make_audio_key(
+            text,
+            voice=f"{voice.name}.onnx:{voice.fingerprint}",
+            sample_rate=voice.sample_rate,
+            params=self._synthesis_params(voice.model)
+        )
+    
+    def _generate_raw_audio(self, text: str, voice: Optional[str] = None) -> bytes:
+        """Generate raw PCM audio data from text."""
+        self.logger.debug(f"Generating raw audio for text: '{text}'")
+        audio_raw_bytes = b"".join(self.synthesize_stream_raw(text, voice))
+        self.logger.debug(f"Generated {len(audio_raw_bytes)} bytes of raw audio")
+        return audio_raw_bytes
+    
+    def _render_chunks(self, text: str, voice: LoadedVoice) -> Iterator[bytes]:
+        """Run Piper on the voice's model, or across its session pool when enabled."""
+        if voice.session_pool is None:
+            yield from voice.model.synthesize_stream_raw(text)
+            return
         
-        try:
-            self.logger.debug(f"Generating raw audio for text: '{text}'")
+        from .pipeline import SentenceSegmenter
+        
+        segmenter = SentenceSegmenter(
+            self.settings.segment_min_clause_chars, self.settings.segment_max_chars
+        )
+        segments = segmenter.feed(text) + segmenter.flush()
+        if len(segments) > 1:
+            yield from voice.session_pool.synthesize_segments(segments)
+            return
+        
+        with voice.session_pool.session() as model:
+            yield from model.synthesize_stream_raw(text)
+    
+    def synthesize_stream_raw(self, text: str, voice: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Synthesize text and yield raw PCM16 mono chunks as Piper produces them.
+        
+        Piper synthesizes sentence by sentence, so the first chunk is available
+        long before the whole reply has been rendered.
+        
+        Args:
+            text: Text to synthesize
+            voice: Voice name (defaults to the configured voice)
             
-            audio_raw_bytes = b''
-            for audio_bytes in self.model.synthesize_stream_raw(text):
-                audio_raw_bytes += audio_bytes
+        Yields:
+            Raw PCM16 audio chunks at the voice's sample rate
             
-            self.logger.debug(f"Generated {len(audio_raw_bytes)} bytes of raw audio")
-            return audio_raw_bytes
+        Raises:
+            TTSException: If synthesis fails
+        """
+        if not text.strip():
+            raise TTSException("Empty text provided for synthesis")
+        
+        loaded = self._get_voice(voice)
+        cache_key = self._audio_key(text, loaded) if self.cache is not None else None
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.debug(f"TTS cache hit for text: '{text}'")
+                yield cached
+                return
+        
+        self.logger.info(f"Streaming synthesis for text: '{text}'")
+        
+        try:
+            chunks: List[bytes] = []
+            # Borrowed: an eviction meanwhile defers stopping the voice's sessions
+            with self.voices.borrow(loaded.name) as loaded:
+                for audio_bytes in self._render_chunks(text, loaded):
+                    if cache_key is not None:
+                        chunks.append(audio_bytes)
+                    yield audio_bytes
             
+            # Only fully rendered audio is cached
+            if cache_key is not None:
+                self.cache.put(cache_key, b"".join(chunks))
+                
         except Exception as e:
-            error_msg = f"Failed to generate raw audio: {str(e)}"
+            error_msg = f"Failed to stream audio: {str(e)}"
             self.logger.error(error_msg)
             raise TTSException(error_msg, str(e))
     
-    def _create_wav_file(self, raw_audio: bytes, sample_rate: int) -> bytes:
-        """Create a complete WAV file from raw PCM audio data."""
-        try:
-            self.logger.debug("Creating WAV file in memory")
-            
-            wav_buffer = io.BytesIO()
-            
-            with wave.open(wav_buffer, 'wb') as wav_file:
-                wav_file.setnchannels(1)  # Mono
-                wav_file.setsampwidth(2)  # 16-bit audio (2 bytes per sample)
-                wav_file.setframerate(sample_rate)
-                wav_file.writeframes(raw_audio)
-            
-            wav_bytes = wav_buffer.getvalue()
-            self.logger.debug(f"Created WAV file: {len(wav_bytes)} bytes")
+    def synthesize_stream(
+        self,
+        text: str,
+        response_format: str = "wav",
+        voice: Optional[str] = None
+    ) -> Iterator[bytes]:
+        """
+        Synthesize text and yield audio without accumulating it.
+        
+        For "wav" a streaming WAV header (unknown data size) is yielded first,
+        then each PCM16 chunk as Piper produces it; "pcm" yields only the chunks.
+        
+        Args:
+            text: Text to synthesize
+            response_format: "wav" or "pcm"
+            voice: Voice name (defaults to the configured voice)
             
-            return wav_bytes
+        Yields:
+            WAV header (for "wav") followed by raw PCM16 audio chunks
             
-        except Exception as e:
-            error_msg = f"Failed to create WAV file: {str(e)}"
-            self.logger.error(error_msg)
-            raise TTSException(error_msg, str(e))
+        Raises:
+            TTSException: If synthesis fails or the format is unknown
+        """
+        if response_format not in ("wav", "pcm"):
+            raise TTSException(f"Unsupported audio format '{response_format}'")
+        
+        chunks = self.synthesize_stream_raw(text, voice)
+        if response_format == "wav":
+            yield build_wav_header(self.get_sample_rate(voice))
+        yield from chunks
     
-    def synthesize_audio(self, text: str) -> Tuple[bytes, int]:
+    def synthesize_audio(self, text: str, voice: Optional[str] = None) -> Tuple[bytes, int]:
         """
         Synthesize text to audio and return WAV file bytes.
         
         Args:
             text: Text to synthesize
+            voice: Voice name (defaults to the configured voice)
             
         Returns:
             Tuple of (wav_bytes, sample_rate)
@@ -98,20 +284,29 @@ class TTSService:
         if not text.strip():
             raise TTSException("Empty text provided for synthesis")
         
-        if not self.model:
-            raise TTSException("Piper TTS model is not available")
+        loaded = self._get_voice(voice)
         
+        # Concurrent requests for the same text wait on one synthesis
+        result, shared = self._inflight.do(
+            self._audio_key(text, loaded), lambda: self._synthesize_wav(text, loaded)
+        )
+        if shared:
+            self.logger.debug(f"Shared in-flight synthesis for text: '{text}'")
+        return result
+    
+    def _synthesize_wav(self, text: str, voice: LoadedVoice) -> Tuple[bytes, int]:
+        """Render text to a complete WAV file."""
         self.logger.info(f"Synthesizing text: '{text}'")
         
         try:
             # Get sample rate from model config
-            sample_rate = self.model.config.sample_rate
+            sample_rate = voice.sample_rate
             
-            # Generate raw PCM audio
-            raw_audio = self._generate_raw_audio(text)
-            
-            # Create complete WAV file
-            wav_bytes = self._create_wav_file(raw_audio, sample_rate)
+            # Keep Piper's chunks as-is, then copy them once behind an exact-size
+            # header: join() allocates the final buffer a single time
+            chunks = list(self.synthesize_stream_raw(text, voice.name))
+            data_size = sum(len(chunk) for chunk in chunks)
+            wav_bytes = b"".join([build_wav_header(sample_rate, data_size), *chunks])
             
             self.logger.info(f"Audio synthesis completed: {len(wav_bytes)} bytes at {sample_rate}Hz")
             return wav_bytes, sample_rate
@@ -127,16 +322,21 @@ class TTSService:
         """Check if the TTS service is available."""
         return self.model is not None
     
-    def get_sample_rate(self) -> int:
-        """Get the sample rate of the loaded model."""
-        if not self.model:
-            raise TTSException("Piper TTS model is not available")
-        return self.model.config.sample_rate
+    def get_sample_rate(self, voice: Optional[str] = None) -> int:
+        """Get the sample rate of a voice (default voice when None)."""
+        return self._get_voice(voice).sample_rate
+    
+    def shutdown(self) -> None:
+        """Unload all voices and stop their session pools."""
+        self.voices.clear()
     
     def reload_model(self) -> None:
         """Reload the Piper TTS model (useful for configuration changes)."""
         self.logger.info("Reloading Piper TTS model")
+        self.shutdown()
         self.model = None
+        if self.cache is not None:
+            self.cache.clear()
         self._load_model()
 
 
@@ -152,10 +352,10 @@ def get_tts_service() -> TTSService:
     return _tts_service
 
 
-def synthesize_audio(text: str) -> Tuple[bytes, int]:
+def synthesize_audio(text: str, voice: Optional[str] = None) -> Tuple[bytes, int]:
     """
     Convenience function for audio synthesis.
     Maintains backward compatibility with existing code.
     """
     service = get_tts_service()
-    return service.synthesize_audio(text)
\ No newline at end of file
+    return service.synthesize_audio(text, voice)
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Registry of loaded Piper voices.
+Voices are loaded on first use and kept resident while they fit the memory
+budget; beyond it the least recently used voices are unloaded.
+"""
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional
+
+from piper.voice import PiperVoice
+
+from ..utils.logger import get_tts_logger
+from ..utils.metrics import get_metrics
+from ..utils.singleflight import SingleFlight
+from .tts_pool import PiperSessionPool
+
+
+@dataclass
+class LoadedVoice:
+    """A resident voice: its model, optional session pool and memory estimate."""
+    name: str
+    model: PiperVoice
+    session_pool: Optional[PiperSessionPool]
+    size_bytes: int
+    # Identity of the model/config files loaded, so cached audio follows model upgrades
+    fingerprint: str = ""
+    # Renders in progress; an unloaded voice keeps its pool until they finish
+    borrowers: int = 0
+    retired: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def sample_rate(self) -> int:
+        return self.model.config.sample_rate
+
+    def _acquire(self) -> None:
+        with self._lock:
+            self.borrowers += 1
+
+    def _give_back(self) -> None:
+        with self._lock:
+            self.borrowers -= 1
+            idle = self.retired and not self.borrowers
+        if idle:
+            self._shutdown()
+
+    def release(self) -> None:
+        """Unload the voice: stop its session pool now, or when its last borrower is done."""
+        with self._lock:
+            self.retired = True
+            idle = not self.borrowers
+        if idle:
+            self._shutdown()
+
+    def _shutdown(self) -> None:
+        if self.session_pool is not None:
+            self.session_pool.shutdown(cancel_pending=False)
+
+
+class VoiceRegistry:
+    """LRU registry of voices bounded by an estimated memory budget."""
+
+    def __init__(
+        self,
+        load_fn: Callable[[str], LoadedVoice],
+        memory_budget_bytes: int,
+        pinned_voice: str
+    ):
+        self.load_fn = load_fn
+        self.memory_budget_bytes = memory_budget_bytes
+        # The default voice serves fallbacks and is never evicted
+        self.pinned_voice = pinned_voice
+        self.logger = get_tts_logger()
+        self._lock = threading.Lock()
+        self._voices: "OrderedDict[str, LoadedVoice]" = OrderedDict()
+        self._loading = SingleFlight("tts.voice_load")
+
+    def get(self, name: str) -> LoadedVoice:
+        """Get a voice, loading it (once, even under concurrency) if needed."""
+        with self._lock:
+            voice = self._voices.get(name)
+            if voice is not None:
+                self._voices.move_to_end(name)
+                return voice
+
+        voice, _ = self._loading.do(name, lambda: self._load(name))
+        return voice
+
+    @contextmanager
+    def borrow(self, name: str) -> Iterator[LoadedVoice]:
+        """Hold a voice for a render so eviction cannot stop its sessions mid-request."""
+        while True:
+            voice = self.get(name)
+            with self._lock:
+                # Evictions happen under the same lock: a resident voice is safe to pin
+                if self._voices.get(name) is voice:
+                    voice._acquire()
+                    break
+        try:
+            yield voice
+        finally:
+            voice._give_back()
+
+    def _load(self, name: str) -> LoadedVoice:
+        """Load a voice and evict others until the registry fits its budget."""
+        voice = self.load_fn(name)
+        get_metrics().increment("tts.voices.loads")
+
+        with self._lock:
+            self._voices[name] = voice
+            evicted = self._evict(keep=name)
+            loaded_bytes = sum(v.size_bytes for v in self._voices.values())
+            loaded_count = len(self._voices)
+
+        for old in evicted:
+            self.logger.info(f"Unloading voice '{old.name}' to stay within the memory budget")
+            get_metrics().increment("tts.voices.evictions")
+            old.release()
+
+        get_metrics().set_gauge("tts.voices.loaded", loaded_count)
+        get_metrics().set_gauge("tts.voices.memory_bytes", loaded_bytes)
+        return voice
+
+    def _evict(self, keep: str) -> List[LoadedVoice]:
+        """Pop least recently used voices while over budget (caller holds the lock)."""
+        evicted = []
+        while sum(v.size_bytes for v in self._voices.values()) > self.memory_budget_bytes:
+            candidate = next(
+                (n for n in self._voices if n not in (keep, self.pinned_voice)), None
+            )
+            if candidate is None:
+                break
+            evicted.append(self._voices.pop(candidate))
+        return evicted
+
+    def loaded(self) -> List[str]:
+        """Names of the resident voices, least recently used first."""
+        with self._lock:
+            return list(self._voices)
+
+    def clear(self) -> None:
+        """Unload every voice."""
+        with self._lock:
+            voices = list(self._voices.values())
+            self._voices.clear()
+        for voice in voices:
+            voice.release()
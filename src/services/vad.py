@@ -0,0 +1,150 @@
+"""
+Energy-based voice activity helpers for the STT pipeline.
+Vectorized NumPy frame-energy analysis used to skip silent clips and trim
+silence before Whisper runs.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from .audio_decoder import WHISPER_SAMPLE_RATE
+
+
+def frame_rms(samples: np.ndarray, frame_size: int) -> np.ndarray:
+    """Compute the RMS energy of consecutive non-overlapping frames (tail dropped)."""
+    frame_count = samples.size // frame_size
+    if frame_count == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:frame_count * frame_size].reshape(frame_count, frame_size)
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_size)
+
+
+def voiced_seconds(
+    samples: np.ndarray,
+    rms_threshold: float,
+    frame_ms: int = 30,
+    sample_rate: int = WHISPER_SAMPLE_RATE
+) -> float:
+    """Total duration of frames whose RMS energy reaches the threshold."""
+    frame_size = max(1, sample_rate * frame_ms // 1000)
+    energies = frame_rms(samples, frame_size)
+    return float(np.count_nonzero(energies >= rms_threshold)) * frame_size / sample_rate
+
+
+def is_silent(
+    samples: np.ndarray,
+    rms_threshold: float,
+    min_duration: float,
+    min_speech: float,
+    frame_ms: int = 30,
+    sample_rate: int = WHISPER_SAMPLE_RATE
+) -> bool:
+    """
+    Decide whether a clip is too short or too quiet to contain speech.
+
+    A clip is skipped when it is shorter than min_duration seconds, or when
+    fewer than min_speech seconds of its frames reach rms_threshold (which
+    also rejects isolated clicks such as a tap on the microphone).
+    """
+    if samples.size < min_duration * sample_rate:
+        return True
+    return voiced_seconds(samples, rms_threshold, frame_ms, sample_rate) < min_speech
+
+
+def trim_silence(
+    samples: np.ndarray,
+    rms_threshold: float,
+    padding_ms: int = 200,
+    max_pause_ms: int = 500,
+    frame_ms: int = 30,
+    sample_rate: int = WHISPER_SAMPLE_RATE
+) -> Tuple[np.ndarray, float]:
+    """
+    Remove leading/trailing silence and shorten long internal pauses.
+
+    Voiced frames are padded by padding_ms on each side so word onsets and
+    tails survive; leading and trailing silence beyond that is dropped and
+    internal pauses are capped at max_pause_ms.
+
+    Returns:
+        Tuple of (trimmed samples, seconds removed)
+    """
+    frame_size = max(1, sample_rate * frame_ms // 1000)
+    voiced = frame_rms(samples, frame_size) >= rms_threshold
+    if not voiced.any():
+        return samples, 0.0
+
+    # Dilate the voiced mask by the padding on both sides
+    pad_frames = padding_ms // frame_ms
+    if pad_frames > 0:
+        window = np.ones(2 * pad_frames + 1, dtype=np.int32)
+        keep = np.convolve(voiced.astype(np.int32), window, mode="same") > 0
+    else:
+        keep = voiced.copy()
+
+    # Locate runs of dropped frames; internal ones keep up to max_pause_ms
+    bounded = np.concatenate(([True], keep, [True])).astype(np.int8)
+    run_starts = np.flatnonzero(np.diff(bounded) == -1)
+    run_ends = np.flatnonzero(np.diff(bounded) == 1)
+    pause_frames = max_pause_ms // frame_ms
+    for start, end in zip(run_starts, run_ends):
+        if start > 0 and end < keep.size:
+            keep[start:start + pause_frames] = True
+
+    # Expand to a per-sample mask; the partial tail frame follows the last frame
+    sample_mask = np.repeat(keep, frame_size)
+    tail = samples.size - sample_mask.size
+    if tail > 0:
+        sample_mask = np.concatenate((sample_mask, np.full(tail, keep[-1])))
+
+    trimmed = samples[sample_mask]
+    return trimmed, (samples.size - trimmed.size) / sample_rate
+
+
+def split_segments(
+    samples: np.ndarray,
+    rms_threshold: float,
+    max_segment_seconds: float = 30.0,
+    padding_ms: int = 200,
+    frame_ms: int = 30,
+    sample_rate: int = WHISPER_SAMPLE_RATE
+) -> List[np.ndarray]:
+    """
+    Split audio into voiced segments no longer than one Whisper window.
+
+    Padded voiced regions are merged greedily while the merged span stays
+    within max_segment_seconds (the same strategy WhisperX uses for its VAD
+    chunks); regions longer than that are cut into fixed-size pieces.
+    """
+    frame_size = max(1, sample_rate * frame_ms // 1000)
+    voiced = frame_rms(samples, frame_size) >= rms_threshold
+    if not voiced.any():
+        return [samples] if samples.size else []
+
+    pad_frames = padding_ms // frame_ms
+    window = np.ones(2 * pad_frames + 1, dtype=np.int32)
+    keep = np.convolve(voiced.astype(np.int32), window, mode="same") > 0
+
+    bounded = np.concatenate(([False], keep, [False])).astype(np.int8)
+    region_starts = np.flatnonzero(np.diff(bounded) == 1) * frame_size
+    region_ends = np.minimum(np.flatnonzero(np.diff(bounded) == -1) * frame_size, samples.size)
+
+    max_samples = int(max_segment_seconds * sample_rate)
+    segments: List[np.ndarray] = []
+    current_start = current_end = None
+
+    for start, end in zip(region_starts, region_ends):
+        if current_start is not None and end - current_start <= max_samples:
+            current_end = end
+            continue
+        if current_start is not None:
+            segments.append(samples[current_start:current_end])
+        # Cut regions that alone exceed the window into fixed-size pieces
+        while end - start > max_samples:
+            segments.append(samples[start:start + max_samples])
+            start += max_samples
+        current_start, current_end = start, end
+
+    segments.append(samples[current_start:current_end])
+    return segments
@@ -0,0 +1,85 @@
+"""
+Single-flight call coalescing for Jarv1s.
+Concurrent calls with the same key share one execution instead of each
+running the same expensive model pass.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .metrics import get_metrics
+
+
+class _Flight:
+    """One in-progress call and the callers waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls across threads."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._waiting = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn, or wait for the identical call already in progress.
+
+        Args:
+            key: Identity of the call
+            fn: Computation to run if no call with this key is in flight
+
+        Returns:
+            Tuple of (result, shared); shared is True when the result came
+            from another caller's execution
+
+        Raises:
+            Whatever fn raised, in the leader and in every waiter
+        """
+        metrics = get_metrics()
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+                self._waiting += 1
+                metrics.set_gauge(f"{self.name}.singleflight.waiting", self._waiting)
+
+        if not leader:
+            metrics.increment(f"{self.name}.singleflight.coalesced")
+            flight.done.wait()
+            with self._lock:
+                self._waiting -= 1
+                metrics.set_gauge(f"{self.name}.singleflight.waiting", self._waiting)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+            if flight.waiters:
+                metrics.observe(f"{self.name}.singleflight.waiters", flight.waiters)
+
+    def waiting(self) -> int:
+        """Number of callers currently waiting on another caller's execution."""
+        with self._lock:
+            return self._waiting
@@ -0,0 +1,132 @@
+"""
+Tests for the subprocess-free upload parsers of the audio decoder.
+Pure Python, no models or FFmpeg needed.
+"""
+
+import struct
+
+import numpy as np
+import pytest
+
+from src.services.audio_decoder import (
+    WHISPER_SAMPLE_RATE,
+    parse_content_type,
+    parse_l16,
+    parse_pcm16_wav,
+    resample_linear,
+)
+from src.utils.exceptions import AudioProcessingException
+
+
+def _wav(
+    pcm: np.ndarray,
+    sample_rate: int = 16000,
+    channels: int = 1,
+    bits: int = 16,
+    format_tag: int = 1,
+    extra_chunk: bytes = b""
+) -> bytes:
+    """Build a WAV file around PCM16 samples (the header may claim other formats)."""
+    data = pcm.astype("<i2").tobytes()
+    fmt = struct.pack(
+        "<HHIIHH", format_tag, channels, sample_rate,
+        sample_rate * channels * bits // 8, channels * bits // 8, bits
+    )
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + extra_chunk
+    body += b"data" + struct.pack("<I", len(data)) + data
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+def test_parse_content_type():
+    assert parse_content_type(None) == ("", {})
+    assert parse_content_type('Audio/L16; rate=8000; Channels="2"') == (
+        "audio/l16", {"rate": "8000", "channels": "2"}
+    )
+
+
+def test_wav_is_normalized_to_float32():
+    samples = parse_pcm16_wav(_wav(np.array([0, 16384, -32768], dtype=np.int16)))
+
+    assert samples.dtype == np.float32
+    np.testing.assert_allclose(samples, [0.0, 0.5, -1.0])
+
+
+def test_stereo_wav_is_downmixed():
+    interleaved = np.array([16384, -16384, 32767, 32767], dtype=np.int16)
+    samples = parse_pcm16_wav(_wav(interleaved, channels=2))
+
+    np.testing.assert_allclose(samples, [0.0, 32767 / 32768], rtol=1e-6)
+
+
+def test_wav_is_resampled_to_16k():
+    samples = parse_pcm16_wav(_wav(np.zeros(8000, dtype=np.int16), sample_rate=8000))
+
+    assert samples.size == WHISPER_SAMPLE_RATE
+
+
+def test_wav_skips_unknown_chunks():
+    # Odd-sized chunks are padded to an even length
+    extra = b"LIST" + struct.pack("<I", 3) + b"abc\x00"
+    samples = parse_pcm16_wav(_wav(np.array([16384] * 4, dtype=np.int16), extra_chunk=extra))
+
+    np.testing.assert_allclose(samples, [0.5] * 4)
+
+
+def test_streamed_wav_with_open_ended_size():
+    wav = bytearray(_wav(np.array([16384] * 4, dtype=np.int16)))
+    wav[40:44] = struct.pack("<I", 0xFFFFFFFF)
+    wav += b"\x00"  # trailing half sample is ignored
+
+    np.testing.assert_allclose(parse_pcm16_wav(bytes(wav)), [0.5] * 4)
+
+
+def test_non_pcm16_wav_needs_a_full_decoder():
+    pcm = np.zeros(32, dtype=np.int16)
+
+    assert parse_pcm16_wav(_wav(pcm, bits=24)) is None
+    assert parse_pcm16_wav(_wav(pcm, format_tag=3)) is None
+    assert parse_pcm16_wav(b"ID3" + b"\x00" * 100) is None
+    assert parse_pcm16_wav(b"RIFF") is None
+
+
+def test_resample_linear():
+    samples = np.linspace(0, 1, 4, dtype=np.float32)
+
+    assert resample_linear(samples, 16000, 16000) is samples
+    resampled = resample_linear(samples, 8000, 16000)
+    assert resampled.size == 8
+    assert resampled.dtype == np.float32
+    np.testing.assert_allclose(resampled[::2], samples)
+
+
+def test_l16_is_big_endian_by_default():
+    pcm = np.array([16384, -16384], dtype=">i2").tobytes()
+
+    np.testing.assert_allclose(parse_l16(pcm, {}), [0.5, -0.5])
+
+
+def test_l16_little_endian():
+    pcm = np.array([16384, -16384], dtype="<i2").tobytes()
+
+    np.testing.assert_allclose(parse_l16(pcm, {"endianness": "little-endian"}), [0.5, -0.5])
+
+
+def test_l16_parameters_from_content_type():
+    _, params = parse_content_type("audio/L16; rate=8000; channels=2")
+    pcm = np.array([16384, 16384] * 8000, dtype=">i2").tobytes()
+    samples = parse_l16(pcm, params)
+
+    assert samples.size == WHISPER_SAMPLE_RATE
+    np.testing.assert_allclose(samples, 0.5)
+
+
+def test_l16_drops_partial_frames():
+    pcm = np.array([16384, 16384], dtype=">i2").tobytes() + b"\x40"
+
+    assert parse_l16(pcm, {"channels": "2"}).size == 1
+
+
+@pytest.mark.parametrize("params", [{"rate": "fast"}, {"rate": "0"}, {"channels": "-1"}])
+def test_l16_rejects_invalid_parameters(params):
+    with pytest.raises(AudioProcessingException):
+        parse_l16(b"\x00\x00", params)
@@ -0,0 +1,78 @@
+"""
+Tests for the in-memory LRU cache and content hashing.
+Pure Python, no models needed.
+"""
+
+from src.utils.cache import LRUCache, content_hash
+
+
+def test_content_hash_is_stable_across_parts():
+    assert content_hash(b"ab", b"c") == content_hash(b"abc")
+    assert content_hash(b"abc") != content_hash(b"abd")
+    assert len(content_hash(b"")) == 32
+
+
+def test_get_returns_stored_values():
+    cache = LRUCache(max_entries=2, max_bytes=100)
+    cache.put("a", b"1")
+
+    assert cache.get("a") == b"1"
+    assert cache.get("missing") is None
+
+
+def test_evicts_least_recently_used_entry():
+    cache = LRUCache(max_entries=2, max_bytes=100)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    cache.get("a")
+    cache.put("c", b"3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+
+
+def test_evicts_to_stay_within_byte_budget():
+    cache = LRUCache(max_entries=10, max_bytes=10)
+    cache.put("a", b"x" * 6)
+    cache.put("b", b"y" * 6)
+
+    assert len(cache) == 1
+    assert cache.get("b") == b"y" * 6
+    assert cache.total_bytes == 6
+
+
+def test_replacing_a_key_updates_its_size():
+    cache = LRUCache(max_entries=10, max_bytes=10)
+    cache.put("a", b"x" * 8)
+    cache.put("a", b"x" * 2)
+
+    assert len(cache) == 1
+    assert cache.total_bytes == 2
+
+
+def test_oversized_values_are_not_cached():
+    cache = LRUCache(max_entries=10, max_bytes=4)
+    cache.put("a", b"1234")
+    cache.put("b", b"12345")
+
+    assert cache.get("a") == b"1234"
+    assert cache.get("b") is None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = LRUCache(max_entries=0, max_bytes=100)
+    cache.put("a", b"1")
+
+    assert cache.get("a") is None
+
+
+def test_custom_size_function_and_clear():
+    cache = LRUCache(max_entries=10, max_bytes=3, size_of=lambda value: 1)
+    for key in "abcd":
+        cache.put(key, object())
+
+    assert len(cache) == 3
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.total_bytes == 0
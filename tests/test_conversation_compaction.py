@@ -0,0 +1,105 @@
+"""
+Tests for background compaction of long conversations.
+Pure Python, no models needed: the LLM call is a stub.
+"""
+
+from src.services.conversation_compaction import ConversationCompactor, build_summary_request
+from src.services.conversation_store import ConversationManager
+
+
+def _add_exchanges(conversation: ConversationManager, start: int, stop: int) -> None:
+    for index in range(start, stop):
+        conversation.add_user_message(f"u{index}")
+        conversation.add_assistant_message(f"a{index}")
+
+
+def _conversation(exchanges: int) -> ConversationManager:
+    conversation = ConversationManager("sys", max_history_pairs=0)
+    _add_exchanges(conversation, 0, exchanges)
+    return conversation
+
+
+def _contents_of(messages):
+    return [message["content"] for message in messages]
+
+
+def _contents(conversation: ConversationManager):
+    return _contents_of(conversation.history[1:])
+
+
+def _run(compactor: ConversationCompactor, conversation: ConversationManager) -> bool:
+    scheduled = compactor.maybe_schedule(conversation)
+    compactor._executor.shutdown(wait=True)
+    return scheduled
+
+
+def test_summary_request_carries_previous_summary():
+    messages = build_summary_request("earlier", [{"role": "user", "content": "u0"}])
+
+    assert messages[0]["role"] == "system"
+    assert "earlier" in messages[1]["content"]
+    assert "user: u0" in messages[1]["content"]
+
+
+def test_compaction_summarizes_all_but_recent_exchanges():
+    requests = []
+
+    def complete(messages):
+        requests.append(messages)
+        return " summary "
+
+    conversation = _conversation(3)
+    assert _run(ConversationCompactor(complete, threshold_tokens=1, keep_recent_pairs=1), conversation)
+    conversation.get_messages()
+
+    assert "u1" in requests[0][1]["content"] and "u2" not in requests[0][1]["content"]
+    assert conversation.summary == "summary"
+    assert _contents(conversation) == ["u2", "a2"]
+    assert not conversation.compacting
+
+
+def test_compaction_below_threshold_is_skipped():
+    conversation = _conversation(3)
+    compactor = ConversationCompactor(lambda messages: "summary", 10 ** 6, keep_recent_pairs=1)
+
+    assert not _run(compactor, conversation)
+    assert conversation.summary is None
+
+
+def test_failed_compaction_keeps_history():
+    def complete(messages):
+        raise RuntimeError("LLM down")
+
+    conversation = _conversation(3)
+    assert _run(ConversationCompactor(complete, threshold_tokens=1, keep_recent_pairs=1), conversation)
+    conversation.get_messages()
+
+    assert conversation.summary is None
+    assert len(conversation.history) == 7
+    assert not conversation.compacting
+
+
+def test_pending_summary_replaces_summarized_messages():
+    conversation = _conversation(3)
+    replaced = conversation.compaction_candidates(keep_recent_pairs=1)
+    assert _contents(conversation)[:4] == _contents_of(replaced)
+
+    conversation.offer_summary("talked about u0 and u1", replaced)
+    messages = conversation.get_messages()
+
+    assert _contents(conversation) == ["u2", "a2"]
+    assert "talked about u0 and u1" in messages[0]["content"]
+    assert conversation.total_tokens == sum(conversation._token_counts)
+
+
+def test_pending_summary_is_discarded_after_reset():
+    conversation = _conversation(3)
+    replaced = conversation.compaction_candidates(keep_recent_pairs=1)
+
+    conversation.reset()
+    _add_exchanges(conversation, 3, 4)
+    conversation.offer_summary("stale", replaced)
+    conversation.get_messages()
+
+    assert conversation.summary is None
+    assert _contents(conversation) == ["u3", "a3"]
@@ -0,0 +1,118 @@
+"""
+Tests for the SQLite conversation backend and session rehydration from it.
+Pure Python, no models needed.
+"""
+
+import pytest
+
+from src.services.conversation_persistence import (
+    SUMMARY_ROLE,
+    SQLiteConversationBackend,
+    create_conversation_backend,
+)
+from src.services.conversation_store import ConversationManager
+from src.utils.exceptions import ConfigurationException
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteConversationBackend(str(tmp_path / "conversations.db"), flush_interval_ms=1)
+    yield backend
+    backend.close()
+
+
+def _exchange(conversation: ConversationManager, index: int) -> None:
+    conversation.add_user_message(f"u{index}")
+    conversation.add_assistant_message(f"a{index}")
+    conversation.trim_history()
+
+
+def _contents(messages):
+    return [message["content"] for message in messages]
+
+
+def test_load_returns_latest_messages_in_order(backend):
+    for index in range(3):
+        backend.append("s", "user", f"u{index}")
+        backend.append("s", "assistant", f"a{index}")
+    backend.append("other", "user", "x")
+
+    assert _contents(backend.load("s", limit=-1)) == ["u0", "a0", "u1", "a1", "u2", "a2"]
+    assert _contents(backend.load("s", limit=2)) == ["u2", "a2"]
+
+
+def test_load_starts_after_reset(backend):
+    backend.append("s", "user", "old")
+    backend.reset("s")
+    backend.append("s", "user", "new")
+
+    assert _contents(backend.load("s", limit=-1)) == ["new"]
+
+
+def test_load_starts_with_latest_summary(backend):
+    backend.append("s", "user", "u0")
+    backend.compact("s", "summary", [{"role": "user", "content": "u1"}])
+    backend.append("s", "assistant", "a1")
+
+    messages = backend.load("s", limit=-1)
+    assert messages[0] == {"role": SUMMARY_ROLE, "content": "summary"}
+    assert _contents(messages[1:]) == ["u1", "a1"]
+
+
+def test_reset_after_summary_drops_it(backend):
+    backend.compact("s", "summary", [])
+    backend.reset("s")
+
+    assert backend.load("s", limit=-1) == []
+
+
+def test_session_is_rehydrated_within_its_bounds(backend):
+    conversation = ConversationManager("sys", max_history_pairs=2, session_id="s", backend=backend)
+    for index in range(4):
+        _exchange(conversation, index)
+
+    restored = ConversationManager("sys", max_history_pairs=2, session_id="s", backend=backend)
+    assert restored.history == conversation.history
+    assert restored.total_tokens == conversation.total_tokens
+
+
+def test_session_is_rehydrated_empty_after_reset(backend):
+    conversation = ConversationManager("sys", session_id="s", backend=backend)
+    _exchange(conversation, 0)
+    conversation.reset()
+    _exchange(conversation, 1)
+
+    restored = ConversationManager("sys", session_id="s", backend=backend)
+    assert _contents(restored.history[1:]) == ["u1", "a1"]
+
+
+def test_session_is_rehydrated_with_its_summary(backend):
+    conversation = ConversationManager("sys", max_history_pairs=0, session_id="s", backend=backend)
+    for index in range(3):
+        _exchange(conversation, index)
+    conversation.offer_summary("summary", conversation.compaction_candidates(keep_recent_pairs=1))
+    conversation.get_messages()
+    _exchange(conversation, 3)
+
+    restored = ConversationManager("sys", max_history_pairs=0, session_id="s", backend=backend)
+    assert restored.summary == "summary"
+    assert restored.history == conversation.history
+    assert _contents(restored.history[1:]) == ["u2", "a2", "u3", "a3"]
+
+
+def test_closed_backend_loads_nothing(backend):
+    backend.append("s", "user", "u0")
+    backend.close()
+
+    assert backend.load("s", limit=-1) == []
+
+
+def test_create_conversation_backend(tmp_path):
+    assert create_conversation_backend("memory", "", 64, 50) is None
+
+    backend = create_conversation_backend("sqlite", str(tmp_path / "c.db"), 64, 50)
+    assert isinstance(backend, SQLiteConversationBackend)
+    backend.close()
+
+    with pytest.raises(ConfigurationException):
+        create_conversation_backend("redis", "", 64, 50)
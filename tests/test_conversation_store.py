@@ -0,0 +1,130 @@
+"""
+Tests for the bounded session -> conversation store.
+Pure Python, no models needed.
+"""
+
+import asyncio
+import time
+
+from src.services.conversation_store import ConversationManager, ConversationStore
+
+
+def _store(**kwargs) -> ConversationStore:
+    kwargs.setdefault("max_sessions", 10)
+    kwargs.setdefault("ttl_seconds", 60)
+    kwargs.setdefault("max_bytes", 10 ** 9)
+    return ConversationStore(
+        lambda session_id: ConversationManager("sys", session_id=session_id), **kwargs
+    )
+
+
+def test_store_returns_the_same_session():
+    store = _store()
+    session = store.get("a")
+
+    assert store.get("a") is session
+    assert store.get("b") is not session
+    assert len(store) == 2
+
+
+def test_store_uses_the_default_session_without_an_id():
+    store = _store()
+
+    assert store.get() is store.get(None)
+    assert len(store) == 1
+
+
+def test_store_evicts_least_recently_used():
+    store = _store(max_sessions=2)
+    first = store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+
+    assert len(store) == 2
+    assert store.get("a") is first
+    # "b" was least recently used, so it comes back as a new conversation
+    assert store.get("b").conversation.get_conversation_length() == 0
+
+
+def test_store_evicts_over_memory_ceiling():
+    store = _store()
+    sessions = [store.get(name) for name in ("a", "b")]
+    for session in sessions:
+        session.conversation.add_user_message("u" * 1000)
+        session.conversation.add_assistant_message("a" * 1000)
+        store.update_size(session)
+    store.max_bytes = sessions[1].size_bytes + 100
+    store.update_size(sessions[1])
+
+    assert len(store) == 1
+    assert store.get("b") is sessions[1]
+
+
+def test_store_expires_idle_sessions():
+    store = _store(ttl_seconds=0.05)
+    session = store.get("a")
+    time.sleep(0.1)
+
+    assert store.get("a") is not session
+    assert len(store) == 1
+
+
+def test_store_skips_sessions_with_a_turn_in_progress():
+    store = _store(max_sessions=1)
+
+    async def run():
+        busy = store.get("a")
+        async with busy.lock:
+            store.get("b")
+            assert store.get("a") is busy
+        store.get("c")
+        return busy
+
+    busy = asyncio.run(run())
+    assert len(store) == 1
+    assert store.get("a") is not busy
+
+
+def test_store_does_not_expire_sessions_with_a_turn_in_progress():
+    store = _store(ttl_seconds=0.05)
+
+    async def run():
+        busy = store.get("a")
+        idle = store.get("b")
+        async with busy.lock:
+            time.sleep(0.1)
+            store.get("c")
+            assert len(store) == 2
+            assert store.get("a") is busy
+        return idle
+
+    idle = asyncio.run(run())
+    assert store.get("b") is not idle
+
+
+def test_discarded_session_is_rebuilt():
+    store = _store()
+    session = store.get("a")
+    store.discard("a")
+
+    assert len(store) == 0
+    assert store.get("a") is not session
+
+
+def test_store_builds_a_session_once_for_concurrent_callers():
+    built = []
+
+    def factory(session_id: str) -> ConversationManager:
+        built.append(session_id)
+        time.sleep(0.05)
+        return ConversationManager("sys", session_id=session_id)
+
+    store = ConversationStore(factory, max_sessions=10, ttl_seconds=60, max_bytes=10 ** 9)
+
+    async def run():
+        return await asyncio.gather(store.get_async("a"), store.get_async("a"))
+
+    first, second = asyncio.run(run())
+    assert first is second
+    assert built == ["a"]
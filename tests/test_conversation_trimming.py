@@ -0,0 +1,157 @@
+"""
+Tests for token-budget history trimming, the stable-prefix layout and
+tokenizer selection.
+Pure Python, no models needed.
+"""
+
+import pytest
+
+from src.services.conversation_store import ConversationManager
+from src.services.tokenizer import (
+    MESSAGE_OVERHEAD_TOKENS,
+    HeuristicTokenizer,
+    Tokenizer,
+    create_tokenizer,
+)
+from src.utils.exceptions import ConfigurationException
+from src.utils.metrics import get_metrics
+
+
+class CharTokenizer(Tokenizer):
+    """One token per character, so budgets are easy to reason about."""
+
+    def count(self, text: str) -> int:
+        return len(text)
+
+
+def _manager(**kwargs) -> ConversationManager:
+    kwargs.setdefault("max_history_pairs", 0)
+    return ConversationManager("sys", tokenizer=CharTokenizer(), **kwargs)
+
+
+def _exchange(conversation: ConversationManager, index: int, size: int = 10) -> None:
+    conversation.add_user_message(f"u{index}".ljust(size, "."))
+    conversation.add_assistant_message(f"a{index}".ljust(size, "."))
+    conversation.trim_history()
+
+
+def _contents(conversation: ConversationManager):
+    return [message["content"][:2] for message in conversation.history[1:]]
+
+
+# Token cost of one message of the default size, and of the system prompt
+MESSAGE = 10 + MESSAGE_OVERHEAD_TOKENS
+SYSTEM = len("sys") + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_trim_keeps_history_within_token_budget():
+    conversation = _manager(token_budget=SYSTEM + 4 * MESSAGE)
+    for index in range(5):
+        _exchange(conversation, index)
+
+    assert _contents(conversation) == ["u3", "a3", "u4", "a4"]
+    assert conversation.total_tokens == SYSTEM + 4 * MESSAGE
+    assert conversation.total_tokens == sum(conversation._token_counts)
+
+
+def test_trim_drops_whole_exchanges():
+    conversation = _manager(token_budget=SYSTEM + 3 * MESSAGE)
+    for index in range(4):
+        _exchange(conversation, index)
+
+    assert _contents(conversation) == ["u3", "a3"]
+
+
+def test_trim_honours_pair_limit():
+    conversation = _manager(max_history_pairs=2)
+    for index in range(4):
+        _exchange(conversation, index)
+
+    assert _contents(conversation) == ["u2", "a2", "u3", "a3"]
+
+
+def test_trim_always_keeps_the_latest_exchange():
+    conversation = _manager(token_budget=SYSTEM + MESSAGE)
+    _exchange(conversation, 0)
+    _exchange(conversation, 1, size=100)
+
+    assert _contents(conversation) == ["u1", "a1"]
+
+
+def test_stable_prefix_trims_in_blocks():
+    budget = SYSTEM + 8 * MESSAGE
+    conversation = _manager(token_budget=budget, stable_prefix=True, trim_target_ratio=0.5)
+    _exchange(conversation, 0)
+    prefix = conversation.history[:3]
+    for index in range(1, 4):
+        _exchange(conversation, index)
+
+    # Under budget: the prefix stays byte-identical turn after turn
+    assert conversation.history[:3] == prefix
+    assert len(conversation.history) == 9
+
+    # Over budget: one cut down to trim_target_ratio of it, not one exchange
+    _exchange(conversation, 4)
+    assert _contents(conversation) == ["u4", "a4"]
+    assert conversation.total_tokens <= budget * 0.5
+
+    _exchange(conversation, 5)
+    assert _contents(conversation) == ["u4", "a4", "u5", "a5"]
+
+
+def test_stable_prefix_keeps_pending_summary_for_the_block_trim():
+    conversation = _manager(token_budget=SYSTEM + 8 * MESSAGE, stable_prefix=True)
+    for index in range(3):
+        _exchange(conversation, index)
+    conversation.offer_summary("summary", conversation.compaction_candidates(keep_recent_pairs=1))
+
+    # Applying it now would rewrite the system message and invalidate the cached prefix
+    conversation.get_messages()
+    assert conversation.summary is None
+
+    for index in range(3, 5):
+        _exchange(conversation, index)
+    assert conversation.summary == "summary"
+
+
+def test_record_prompt_reports_reused_prefix():
+    metrics = get_metrics()
+    metrics.reset()
+    conversation = _manager()
+    _exchange(conversation, 0)
+
+    first = conversation.get_messages() + [{"role": "user", "content": "q1"}]
+    conversation.record_prompt(first)
+    second = conversation.get_messages() + [{"role": "user", "content": "q2"}]
+    conversation.record_prompt(second)
+
+    counters = metrics.snapshot()["counters"]
+    shared = SYSTEM + 2 * MESSAGE
+    assert counters["llm.prefix.prompt_tokens"] == 2 * (shared + 2 + MESSAGE_OVERHEAD_TOKENS)
+    assert counters["llm.prefix.reused_tokens"] == shared
+
+
+def test_token_counts_survive_reset():
+    conversation = _manager()
+    _exchange(conversation, 0)
+    conversation.reset()
+
+    assert conversation.history[1:] == []
+    assert conversation.total_tokens == SYSTEM == sum(conversation._token_counts)
+
+
+def test_heuristic_tokenizer_errs_high():
+    tokenizer = HeuristicTokenizer(chars_per_token=4)
+
+    assert tokenizer.count("") == 0
+    assert tokenizer.count("abcde") == 2
+
+
+def test_auto_tokenizer_falls_back_for_unknown_models():
+    assert isinstance(create_tokenizer("auto", "openai/lmstudio-local-model"), HeuristicTokenizer)
+    assert isinstance(create_tokenizer("heuristic", "openai/gpt-4o"), HeuristicTokenizer)
+
+    with pytest.raises(ConfigurationException):
+        create_tokenizer("litellm", "openai/lmstudio-local-model")
+    with pytest.raises(ConfigurationException):
+        create_tokenizer("tiktoken", "openai/gpt-4o")
@@ -0,0 +1,68 @@
+"""
+Tests for splitting streamed LLM text into speakable segments.
+Pure Python, no models needed.
+"""
+
+from src.services.pipeline import SentenceSegmenter
+
+
+def _segment(deltas, **kwargs):
+    segmenter = SentenceSegmenter(**kwargs)
+    segments = []
+    for delta in deltas:
+        segments.extend(segmenter.feed(delta))
+    return segments + segmenter.flush()
+
+
+def test_splits_at_sentence_ends():
+    assert _segment(["Hola. ¿Qué tal? ", "Bien!"]) == ["Hola.", "¿Qué tal?", "Bien!"]
+
+
+def test_waits_for_whitespace_after_a_terminator():
+    segmenter = SentenceSegmenter()
+
+    assert segmenter.feed("Versión 3.") == []
+    assert segmenter.feed("5 lista. ") == ["Versión 3.5 lista."]
+    assert segmenter.flush() == []
+
+
+def test_sentence_split_across_deltas():
+    assert _segment(["Hol", "a mun", "do. Adi", "ós"]) == ["Hola mundo.", "Adiós"]
+
+
+def test_keeps_closing_quotes_with_the_sentence():
+    assert _segment(['Dijo "vale." Luego se fue.']) == ['Dijo "vale."', "Luego se fue."]
+
+
+def test_splits_at_newlines():
+    assert _segment(["uno\n\ndos"]) == ["uno", "dos"]
+
+
+def test_long_text_splits_at_clauses():
+    text = "Esta primera parte es bastante larga, y esta es la segunda"
+
+    assert _segment([text], min_clause_chars=20) == [
+        "Esta primera parte es bastante larga,",
+        "y esta es la segunda",
+    ]
+
+
+def test_short_clauses_are_not_split():
+    assert _segment(["Sí, claro, vale"], min_clause_chars=40) == ["Sí, claro, vale"]
+
+
+def test_unpunctuated_text_is_cut_at_a_word_boundary():
+    segmenter = SentenceSegmenter(min_clause_chars=100, max_segment_chars=20)
+
+    assert segmenter.feed("una frase sin puntuación que sigue") == [
+        "una frase sin",
+        "puntuación que",
+    ]
+    assert segmenter.flush() == ["sigue"]
+
+
+def test_flush_of_empty_buffer():
+    segmenter = SentenceSegmenter()
+
+    assert segmenter.feed("   ") == []
+    assert segmenter.flush() == []
@@ -0,0 +1,116 @@
+"""
+Tests for single-flight coalescing of identical concurrent calls.
+Pure Python, no models needed.
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.utils.singleflight import SingleFlight
+
+
+def _wait_for_waiters(flight: SingleFlight, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while flight.waiting() < count:
+        assert time.monotonic() < deadline, "waiters never arrived"
+        time.sleep(0.001)
+
+
+def _run_concurrently(flight: SingleFlight, key, fn, callers: int):
+    """Start one leader blocked in fn, let callers-1 join it, then release it."""
+    release = threading.Event()
+    results = []
+
+    def leader_fn():
+        release.wait(5)
+        return fn()
+
+    def call():
+        try:
+            results.append(flight.do(key, leader_fn))
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    threads[0].start()
+    time.sleep(0.02)
+    for thread in threads[1:]:
+        thread.start()
+    _wait_for_waiters(flight, callers - 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_single_caller_runs_the_function():
+    flight = SingleFlight("test")
+
+    assert flight.do("k", lambda: 42) == (42, False)
+
+
+def test_concurrent_identical_calls_run_once():
+    flight = SingleFlight("test")
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return "result"
+
+    results = _run_concurrently(flight, "k", fn, callers=4)
+
+    assert len(calls) == 1
+    assert sorted(results, key=lambda r: r[1]) == [("result", False)] + [("result", True)] * 3
+    assert flight.waiting() == 0
+
+
+def _fail():
+    raise ValueError("boom")
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight("test")
+    results = _run_concurrently(flight, "k", _fail, callers=3)
+
+    assert len(results) == 3
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_finished_calls_are_not_shared():
+    flight = SingleFlight("test")
+    flight.do("k", lambda: 1)
+
+    assert flight.do("k", lambda: 2) == (2, False)
+
+
+def test_error_does_not_stick_to_the_key():
+    flight = SingleFlight("test")
+    with pytest.raises(ValueError):
+        flight.do("k", _fail)
+
+    assert flight.do("k", lambda: "ok") == ("ok", False)
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight("test")
+    started = threading.Barrier(2, timeout=5)
+
+    def fn(value):
+        # Both calls must be in flight at once for the barrier to pass
+        started.wait()
+        return value
+
+    results = {}
+
+    def call(key):
+        results[key] = flight.do(key, lambda: fn(key))
+
+    threads = [threading.Thread(target=call, args=(key,)) for key in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == {"a": ("a", False), "b": ("b", False)}
@@ -0,0 +1,73 @@
+"""
+Tests for the two-tier TTS audio cache and its keys.
+Pure Python, no voices needed.
+"""
+
+from src.services.tts_cache import TTSAudioCache, make_audio_key, normalize_text
+
+
+def _cache(path, disk_max_bytes: int = 1000) -> TTSAudioCache:
+    return TTSAudioCache(
+        str(path), memory_max_entries=10, memory_max_bytes=1000, disk_max_bytes=disk_max_bytes
+    )
+
+
+def test_normalize_text():
+    assert normalize_text("  Hola \n  mundo ") == "Hola mundo"
+    # Decomposed "é" matches the composed form
+    assert normalize_text("café") == normalize_text("café")
+
+
+def test_key_ignores_whitespace_and_param_order():
+    key = make_audio_key("Hola  mundo", "voice.onnx:1", 22050, {"a": 1, "b": 2})
+
+    assert key == make_audio_key(" Hola mundo ", "voice.onnx:1", 22050, {"b": 2, "a": 1})
+
+
+def test_key_follows_the_model_files():
+    # Same voice name, replaced model file: cached audio must not be reused
+    old = make_audio_key("Hola", "voice.onnx:100-1", 22050, {})
+    new = make_audio_key("Hola", "voice.onnx:100-2", 22050, {})
+
+    assert old != new
+    assert old != make_audio_key("Hola", "voice.onnx:100-1", 16000, {})
+    assert old != make_audio_key("Hola", "voice.onnx:100-1", 22050, {"length_scale": 1.2})
+
+
+def test_disk_tier_survives_restarts(tmp_path):
+    _cache(tmp_path).put("ab12", b"pcm")
+
+    restarted = _cache(tmp_path)
+    assert restarted.get("ab12") == b"pcm"
+    assert restarted.memory.get("ab12") == b"pcm"
+
+
+def test_clear_keeps_the_disk_tier(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("ab12", b"pcm")
+    cache.clear()
+
+    assert cache.memory.get("ab12") is None
+    assert cache.get("ab12") == b"pcm"
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = _cache(tmp_path, disk_max_bytes=10)
+    cache.put("aa01", b"x" * 4)
+    cache.put("bb02", b"y" * 4)
+    cache.clear()
+    cache.get("aa01")
+    cache.put("cc03", b"z" * 4)
+    cache.clear()
+
+    assert cache.get("aa01") == b"x" * 4
+    assert cache.get("bb02") is None
+    assert not (tmp_path / "bb" / "bb02.pcm").exists()
+
+
+def test_memory_only_cache(tmp_path):
+    cache = _cache(tmp_path / "unused", disk_max_bytes=0)
+    cache.put("ab12", b"pcm")
+
+    assert cache.get("ab12") == b"pcm"
+    assert not (tmp_path / "unused").exists()
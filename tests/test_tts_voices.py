@@ -0,0 +1,129 @@
+"""
+Tests for the LRU registry of loaded voices.
+Uses stand-in voices; only the Piper package itself must be installed.
+"""
+
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("piper")
+
+from src.services.tts_voices import LoadedVoice, VoiceRegistry  # noqa: E402
+
+
+class FakePool:
+    """Records when a voice's session pool is shut down."""
+
+    def __init__(self):
+        self.stopped = False
+
+    def shutdown(self, cancel_pending: bool = True) -> None:
+        self.stopped = True
+
+
+def _registry(budget: int = 2, pinned: str = "default"):
+    loads = []
+
+    def load(name: str) -> LoadedVoice:
+        loads.append(name)
+        return LoadedVoice(name=name, model=None, session_pool=FakePool(), size_bytes=1)
+
+    return VoiceRegistry(load, memory_budget_bytes=budget, pinned_voice=pinned), loads
+
+
+def test_voices_load_once():
+    registry, loads = _registry()
+
+    assert registry.get("a") is registry.get("a")
+    assert loads == ["a"]
+
+
+def test_concurrent_first_use_loads_once():
+    registry, loads = _registry()
+    release = threading.Event()
+    original = registry.load_fn
+
+    def slow_load(name):
+        release.wait(5)
+        return original(name)
+
+    registry.load_fn = slow_load
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("a"))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert loads == ["a"]
+    assert results[0] is results[1] is results[2]
+
+
+def test_least_recently_used_voice_is_unloaded():
+    registry, _ = _registry(budget=2, pinned="default")
+    a = registry.get("a")
+    registry.get("b")
+    registry.get("a")
+    b_pool = registry.get("b").session_pool
+    registry.get("a")
+    registry.get("c")
+
+    assert registry.loaded() == ["a", "c"]
+    assert b_pool.stopped
+    assert not a.session_pool.stopped
+
+
+def test_pinned_voice_is_never_unloaded():
+    registry, _ = _registry(budget=1, pinned="default")
+    default = registry.get("default")
+    registry.get("a")
+    registry.get("b")
+
+    assert registry.loaded() == ["default", "b"]
+    assert not default.session_pool.stopped
+
+
+def test_clear_unloads_every_voice():
+    registry, _ = _registry()
+    voices = [registry.get(name) for name in ("a", "b")]
+    registry.clear()
+
+    assert registry.loaded() == []
+    assert all(voice.session_pool.stopped for voice in voices)
+
+
+def test_borrowed_voice_keeps_its_pool_until_returned():
+    registry, _ = _registry(budget=1, pinned="default")
+
+    with registry.borrow("a") as voice:
+        registry.get("b")  # evicts "a" mid-render
+        assert registry.loaded() == ["b"]
+        assert voice.retired
+        assert not voice.session_pool.stopped
+
+    assert voice.borrowers == 0
+    assert voice.session_pool.stopped
+
+
+def test_unborrowed_voice_stops_on_eviction():
+    registry, _ = _registry(budget=1, pinned="default")
+    voice = registry.get("a")
+    registry.get("b")
+
+    assert voice.retired
+    assert voice.session_pool.stopped
+
+
+def test_borrow_after_eviction_reloads_the_voice():
+    registry, loads = _registry(budget=1, pinned="default")
+    evicted = registry.get("a")
+    registry.get("b")
+
+    with registry.borrow("a") as voice:
+        assert voice is not evicted
+        assert voice.borrowers == 1
+    assert loads == ["a", "b", "a"]
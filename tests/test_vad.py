@@ -0,0 +1,89 @@
+"""
+Tests for the frame-energy voice activity helpers.
+Pure NumPy, no models needed.
+"""
+
+import numpy as np
+
+from src.services.vad import frame_rms, is_silent, trim_silence, voiced_seconds
+
+
+RATE = 16000
+THRESHOLD = 0.01
+
+
+def _tone(seconds: float, amplitude: float = 0.5) -> np.ndarray:
+    t = np.arange(int(seconds * RATE), dtype=np.float32) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * RATE), dtype=np.float32)
+
+
+def test_frame_rms():
+    samples = np.array([1, -1, 0, 0, 0.5], dtype=np.float32)
+
+    np.testing.assert_allclose(frame_rms(samples, 2), [1.0, 0.0])
+    assert frame_rms(samples[:1], 2).size == 0
+
+
+def test_voiced_seconds_counts_loud_frames():
+    samples = np.concatenate((_silence(0.3), _tone(0.6), _silence(0.3)))
+
+    assert abs(voiced_seconds(samples, THRESHOLD) - 0.6) < 0.05
+
+
+def test_too_short_clip_is_silent():
+    assert is_silent(_tone(0.1), THRESHOLD, min_duration=0.3, min_speech=0.05)
+
+
+def test_quiet_clip_is_silent():
+    samples = _tone(1.0, amplitude=0.001)
+
+    assert is_silent(samples, THRESHOLD, min_duration=0.3, min_speech=0.1)
+
+
+def test_isolated_click_is_silent():
+    samples = _silence(1.0)
+    samples[8000:8100] = 0.9
+
+    assert is_silent(samples, THRESHOLD, min_duration=0.3, min_speech=0.1)
+
+
+def test_speech_is_not_silent():
+    samples = np.concatenate((_silence(0.5), _tone(0.5)))
+
+    assert not is_silent(samples, THRESHOLD, min_duration=0.3, min_speech=0.1)
+
+
+def test_trim_removes_leading_and_trailing_silence():
+    samples = np.concatenate((_silence(1.0), _tone(1.0), _silence(1.0)))
+    trimmed, removed = trim_silence(samples, THRESHOLD, padding_ms=200)
+
+    # The tone plus up to 200 ms of padding on each side
+    assert 1.0 <= trimmed.size / RATE <= 1.45
+    assert removed == (samples.size - trimmed.size) / RATE
+
+
+def test_trim_caps_internal_pauses():
+    samples = np.concatenate((_tone(0.5), _silence(3.0), _tone(0.5)))
+    trimmed, _ = trim_silence(samples, THRESHOLD, padding_ms=0, max_pause_ms=500)
+
+    assert abs(trimmed.size / RATE - 1.5) < 0.1
+
+
+def test_trim_keeps_short_pauses():
+    samples = np.concatenate((_tone(0.5), _silence(0.2), _tone(0.5)))
+    trimmed, removed = trim_silence(samples, THRESHOLD, padding_ms=0, max_pause_ms=500)
+
+    assert removed < 0.05
+    assert trimmed.size >= samples.size - 0.05 * RATE
+
+
+def test_trim_leaves_silent_audio_alone():
+    samples = _silence(1.0)
+    trimmed, removed = trim_silence(samples, THRESHOLD)
+
+    assert trimmed is samples
+    assert removed == 0.0